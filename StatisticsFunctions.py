@@ -1,215 +1,2060 @@
 #-*- coding: utf-8 -*-
 
-from xlrd import open_workbook
-from collections import OrderedDict, Counter, namedtuple
-from scipy import stats
-from prettytable import PrettyTable as PT
+from collections import OrderedDict
 import unicodedata
-import xlsxwriter as xls
+import csv
+import os
+import hashlib
+import json
+import shutil
+import importlib
+import subprocess
+import sys
+import multiprocessing
+from multiprocessing.pool import ThreadPool
+from StringIO import StringIO
+import Queue
 import itertools
-import pyvttbl as pt
+import functools
+import threading
+import time
+import numpy as np
+
+# -----LAZY IMPORTS-----------------------------------------------------------------------------------------------------
+
+
+class _LazyModule(object):
+    '''Module imported the first time one of its attributes is used, so a run only pays the import of the
+    backends it needs (scipy, file readers and writers, table rendering).'''
+
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def __getattr__(self, attribute):
+        if self._module is None:
+            self.__dict__['_module'] = importlib.import_module(self._name)
+        return getattr(self._module, attribute)
+
+
+stats = _LazyModule('scipy.stats')
+xlrd = _LazyModule('xlrd')
+xls = _LazyModule('xlsxwriter')
+prettytable = _LazyModule('prettytable')
+
+# -----PROFILING--------------------------------------------------------------------------------------------------------
+
+
+class Profiler(object):
+    '''Named timing spans and counters of the stages of the functions (file parsing, text normalization,
+    grouping, scipy calls, table building and printing...). The public functions open a span with their
+    name and their stages nested spans, so a trace shows where the time of a run went. Profiling is off
+    until a Profiler is enabled with enableProfiling (or used in a with block), and then every span and
+    counter is also passed to sink, if given, as a dict: {'type': 'span', 'name', 'start', 'seconds',
+    'thread', 'depth'} or {'type': 'counter', 'name', 'value'}. Spans opened in process pools (workers
+    option) are not recorded, only the span of the call that waits for them.'''
+
+    def __init__(self, sink=None):
+        self.sink = sink
+        self.spans = []
+        self.counters = OrderedDict()
+        self.origin = time.time()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._previous = None
+
+    def span(self, name):
+        '''Context manager timing its block as the span name.'''
+        return _Span(self, name)
+
+    def count(self, name, value=1):
+        '''Adds value to the counter name.'''
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+        if self.sink is not None:
+            self.sink({'type': 'counter', 'name': name, 'value': value})
+
+    def _record(self, name, start, seconds, depth):
+        span = {'type': 'span', 'name': name, 'start': start - self.origin, 'seconds': seconds,
+                'thread': threading.current_thread().name, 'depth': depth}
+        with self._lock:
+            self.spans.append(span)
+        if self.sink is not None:
+            self.sink(span)
+
+    def summary(self):
+        '''Table of the spans by name, from the slowest in total: number of calls and total, mean and
+        maximum time, followed by the counters (list).'''
+        names = OrderedDict()
+        for span in self.spans:
+            names.setdefault(span['name'], []).append(span['seconds'])
+        rows = sorted(names.items(), key=lambda item: -sum(item[1]))
+        table_matrix = [['Stage', 'Calls', 'Total (s)', 'Mean (ms)', 'Max (ms)']]
+        for name, seconds in rows:
+            table_matrix.append([name, len(seconds), sum(seconds), 1000 * sum(seconds) / len(seconds),
+                                 1000 * max(seconds)])
+        for name, value in self.counters.items():
+            table_matrix.append([name, value, '', '', ''])
+        return table_matrix
+
+    def show(self):
+        '''Prints the summary table in the terminal.'''
+        print _renderTable(self.summary())
+
+    def trace(self):
+        '''Spans and counters in the Trace Event format read by chrome://tracing and Perfetto (dict).'''
+        events = []
+        for span in self.spans:
+            events.append({'name': span['name'], 'ph': 'X', 'pid': os.getpid(), 'tid': span['thread'],
+                           'ts': 1e6 * span['start'], 'dur': 1e6 * span['seconds']})
+        for name, value in self.counters.items():
+            events.append({'name': name, 'ph': 'C', 'pid': os.getpid(), 'ts': 0, 'args': {name: value}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def saveTrace(self, path):
+        '''Saves the trace as a JSON file.'''
+        with open(path, 'w') as f:
+            json.dump(self.trace(), f)
+
+    def reset(self):
+        '''Removes the recorded spans and counters.'''
+        with self._lock:
+            self.spans = []
+            self.counters = OrderedDict()
+            self.origin = time.time()
+
+    def __enter__(self):
+        global _profiler
+        self._previous = _profiler
+        _profiler = self
+        return self
+
+    def __exit__(self, *exception):
+        global _profiler
+        _profiler = self._previous
+        self._previous = None
+        return False
+
+
+class _Span(object):
+    __slots__ = ('profiler', 'name', 'start', 'depth')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        local = self.profiler._local
+        self.depth = getattr(local, 'depth', 0)
+        local.depth = self.depth + 1
+        self.start = time.time()
+        return self
+
+    def __exit__(self, *exception):
+        seconds = time.time() - self.start
+        self.profiler._local.depth = self.depth
+        self.profiler._record(self.name, self.start, seconds, self.depth)
+        return False
+
+
+class _NoSpan(object):
+    '''Span used while profiling is off.'''
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+_profiler = None
+
+
+def enableProfiling(sink=None):
+    '''This function starts recording the spans and counters of every function called afterwards.
+    INPUT: sink is an optional function called with each span and counter (function, see Profiler).
+    OUTPUT: The Profiler in use (Profiler).'''
+    global _profiler
+    _profiler = Profiler(sink)
+    return _profiler
+
+
+def disableProfiling():
+    '''This function stops the profiling, the cost of the instrumentation is then a global lookup per stage.
+    OUTPUT: The Profiler that was in use, with its spans and counters (Profiler).'''
+    global _profiler
+    profiler = _profiler
+    _profiler = None
+    return profiler
+
+
+def _span(name):
+    if _profiler is None:
+        return _NO_SPAN
+    return _profiler.span(name)
+
+
+def _count(name, value=1):
+    if _profiler is not None:
+        _profiler.count(name, value)
+
+
+def _profiled(function):
+    '''Decorator opening a span with the name of the function around each call.'''
+    name = function.__name__
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if _profiler is None:
+            return function(*args, **kwargs)
+        with _profiler.span(name):
+            return function(*args, **kwargs)
+    return wrapper
+
+# -----DATA STRUCTURES--------------------------------------------------------------------------------------------------
+
+
+class Categorical(object):
+    '''Text variable stored as integer codes over the list of its distinct values (categories).
+    Indexing with an integer returns the value of that row, indexing with a slice, a boolean mask
+    or an index array returns a new Categorical, and comparing with a value returns a boolean mask
+    over the rows.'''
+
+    def __init__(self, codes, categories):
+        self.codes = np.asarray(codes, dtype=np.int32)
+        self.categories = list(categories)
+
+    @classmethod
+    def fromValues(cls, values):
+        '''Builds a Categorical from a sequence of values, categories are kept in order of appearance.'''
+        lookup = {}
+        codes = np.fromiter((lookup.setdefault(value, len(lookup)) for value in values), dtype=np.int32,
+                            count=len(values))
+        categories = [None] * len(lookup)
+        for value, code in lookup.iteritems():
+            categories[code] = value
+        return cls(codes, categories)
+
+    def codeOf(self, value):
+        '''Returns the code of value or -1 if value is not one of the categories.'''
+        try:
+            return self.categories.index(value)
+        except ValueError:
+            return -1
+
+    def tolist(self):
+        categories = self.categories
+        return [categories[code] for code in self.codes.tolist()]
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __iter__(self):
+        return iter(self.tolist())
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, long, np.integer)):
+            return self.categories[self.codes[key]]
+        return Categorical(self.codes[key], self.categories)
+
+    def __eq__(self, value):
+        return self.codes == self.codeOf(value)
+
+    def __ne__(self, value):
+        return self.codes != self.codeOf(value)
+
+    __hash__ = None
+
+    def __array__(self, dtype=None):
+        return np.asarray(self.tolist(), dtype=dtype)
+
+    def __repr__(self):
+        return 'Categorical(%d rows, categories=%r)' % (len(self.codes), self.categories)
+
+
+class DataSet(OrderedDict):
+    '''Dictionary of variables as returned by dataRead. Numeric variables are stored as float64
+    arrays (empty cells are NaN) and text variables as Categorical columns, so the tests hand them
+    to scipy without any conversion while keeping the usual data['variable'] access.'''
+
+    def nrows(self):
+        '''Returns the number of rows of the data set.'''
+        for column in self.itervalues():
+            return len(column)
+        return 0
+
+    def array(self, name):
+        '''Returns the variable name as a float64 array (no copy for numeric variables).'''
+        return np.asarray(self[name], dtype=np.float64)
+
+    def matrix(self, *names):
+        '''Returns the variables in names stacked as the columns of a float64 rows x variables array.'''
+        return _dataMatrix(self, names)
+
+    def append(self, other):
+        '''Adds the rows of other (a DataSet with the same variables, e.g. a chunk of dataStream) at the end
+        of every variable. The cached descriptives of the previous columns are removed.'''
+        if list(other.keys()) != list(self.keys()):
+            raise ValueError('the data sets must have the same variables')
+        for name, column in self.items():
+            if _descriptiveCache is not None and not isinstance(column, Categorical):
+                _descriptiveCache.invalidate(column)
+            added = other[name]
+            if isinstance(column, Categorical) or isinstance(added, Categorical):
+                values = list(column) + list(added)
+                self[name] = _buildCategorical(values)
+            else:
+                self[name] = np.concatenate((np.asarray(column, dtype=np.float64),
+                                             np.asarray(added, dtype=np.float64)))
+        return self
+
+
+class GroupIndex(object):
+    '''Rows of each category of a grouping variable. The variable is factorized once into integer codes
+    and the row numbers are sorted by code (stable sort), so the rows of group g are the slice
+    order[offsets[g]:offsets[g + 1]]. When the rows of a group are contiguous in the data, take returns
+    a view of the variable instead of a copy. The missing values (NaN, the empty cells of a numeric
+    variable) form a single group named ''.'''
+
+    def __init__(self, column):
+        if not isinstance(column, Categorical):
+            if isinstance(column, np.ndarray):
+                column = column.tolist()
+            column = Categorical.fromValues(['' if value != value else value for value in column])
+        counts = np.bincount(column.codes, minlength=len(column.categories))
+        used = np.flatnonzero(counts)
+        if len(used) < len(column.categories):
+            recode = np.zeros(len(column.categories), dtype=np.int32)
+            recode[used] = np.arange(len(used))
+            column = Categorical(recode[column.codes], [column.categories[c] for c in used])
+            counts = counts[used]
+        self.categories = column.categories
+        self.codes = column.codes
+        self.order = np.argsort(column.codes, kind='mergesort')
+        self.offsets = np.concatenate(([0], np.cumsum(counts)))
+
+    def __len__(self):
+        return len(self.categories)
+
+    def rows(self, g):
+        '''Row numbers of group g (int).'''
+        return self.order[self.offsets[g]:self.offsets[g + 1]]
+
+    def take(self, column, g):
+        '''Values of column for the rows of group g.'''
+        rows = self.rows(g)
+        if len(rows) > 0 and rows[-1] - rows[0] + 1 == len(rows):
+            return column[rows[0]:rows[-1] + 1]
+        return column[rows]
+
+    def group(self, data, g, names=None):
+        '''DataSet with the variables in names (all by default) of data for the rows of group g.'''
+        if names is None:
+            names = data.keys()
+        subset = DataSet()
+        for name in names:
+            column = data[name]
+            if isinstance(column, list):
+                column = _buildColumn(column)
+            subset[name] = self.take(column, g)
+        return subset
+
+
+class RunningMoments(object):
+    '''Count, mean, sum of squared deviations, minimum and maximum of a numeric variable updated
+    chunk by chunk, so descriptives can be computed without holding the whole variable in memory.
+    Two RunningMoments computed over different parts of the data can be merged.'''
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        '''Adds the values of a chunk, NaN values are ignored.'''
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) > 0:
+            chunk = RunningMoments()
+            chunk.n = len(values)
+            chunk.mean = values.mean()
+            chunk.m2 = ((values - chunk.mean) ** 2).sum()
+            chunk.min = values.min()
+            chunk.max = values.max()
+            self.merge(chunk)
+        return self
+
+    def merge(self, other):
+        '''Combines the moments of other into this one (Chan et al. pairwise update).'''
+        n = self.n + other.n
+        if other.n > 0:
+            delta = other.mean - self.mean
+            self.mean = self.mean + delta * other.n / n
+            self.m2 = self.m2 + other.m2 + delta ** 2 * self.n * other.n / n
+            self.n = n
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+        return self
+
+    def variance(self):
+        '''Sample variance (n - 1 denominator).'''
+        if self.n < 2:
+            return np.nan
+        return self.m2 / (self.n - 1)
+
+    def std(self):
+        return np.sqrt(self.variance())
+
+
+def _ascii(value):
+    '''Folds unicode values to plain ascii strings, other values are returned untouched.'''
+    if isinstance(value, unicode):
+        return unicodedata.normalize('NFKD', value).encode('ascii', 'ignore')
+    return value
+
+
+def _buildColumn(values, text=None):
+    '''Converts a list of cell values into a float64 array when every value is numeric or empty,
+    or into a Categorical of ascii folded values otherwise. text tells whether the column has text
+    cells (workbooks know the type of each cell), so text that looks like a number ('001') stays
+    text. When text is None (csv files) the text values that read as numbers are numeric.'''
+    if text:
+        return _buildCategorical(values)
+    try:
+        return np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        pass
+    column = np.empty(len(values), dtype=np.float64)
+    for i in range(len(values)):
+        value = values[i]
+        if value is None or value == '':
+            column[i] = np.nan
+        else:
+            try:
+                column[i] = value
+            except (TypeError, ValueError):
+                return _buildCategorical(values)
+    return column
+
+
+def _numericColumn(values):
+    '''Converts a list of cell values into a float64 array, the empty and the non-numeric values are NaN.'''
+    try:
+        return np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        pass
+    column = np.empty(len(values), dtype=np.float64)
+    for i in range(len(values)):
+        try:
+            column[i] = np.nan if values[i] is None or values[i] == '' else values[i]
+        except (TypeError, ValueError):
+            column[i] = np.nan
+    return column
+
+
+def _dataMatrix(data, names):
+    '''Stacks the variables in names of any data dictionary as the columns of a float64 array.'''
+    out = np.empty((len(data[names[0]]), len(names)), dtype=np.float64)
+    for j in range(len(names)):
+        out[:, j] = data[names[j]]
+    return out
+
+
+def _buildCategorical(values):
+    raw = Categorical.fromValues(values)
+    with _span('unicode.normalize'):
+        folded = Categorical.fromValues([_ascii(value) for value in raw.categories])
+    return Categorical(folded.codes[raw.codes], folded.categories)
+
+# -----DATA CACHE-------------------------------------------------------------------------------------------------------
+
+
+class DataCache(object):
+    '''On-disk cache of the DataSets built by dataRead. Each workbook gets an entry directory with one
+    .npy file per variable (float64 values or Categorical codes) and a manifest.json holding the
+    variable names, the categories and the size, mtime and sha1 of the source file. Entries are loaded
+    memory-mapped copy-on-write (changes to the loaded variables stay in memory, as with a parsed file),
+    an entry whose source changed is discarded, and the least recently used entries are removed when the
+    directory grows over maxBytes.'''
+
+    def __init__(self, directory, maxBytes=2 ** 30):
+        self.directory = directory
+        self.maxBytes = maxBytes
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def _entry(self, file):
+        return os.path.join(self.directory, hashlib.sha1(os.path.abspath(file)).hexdigest())
+
+    def load(self, file):
+        '''Returns the cached DataSet of file or None if there is no valid entry for it.'''
+        entry = self._entry(file)
+        manifestPath = os.path.join(entry, 'manifest.json')
+        if not os.path.isfile(manifestPath):
+            return None
+        with open(manifestPath) as f:
+            manifest = json.load(f)
+        info = os.stat(file)
+        if info.st_size != manifest['size']:
+            shutil.rmtree(entry, ignore_errors=True)
+            return None
+        if info.st_mtime != manifest['mtime']:
+            if _fileHash(file) != manifest['sha1']:
+                shutil.rmtree(entry, ignore_errors=True)
+                return None
+            manifest['mtime'] = info.st_mtime
+            with open(manifestPath, 'w') as f:
+                json.dump(manifest, f)
+        data = DataSet()
+        for column in manifest['columns']:
+            values = np.load(os.path.join(entry, column['file']), mmap_mode='c')
+            if column['categories'] is None:
+                data[_fromJson(column['name'])] = values
+            else:
+                data[_fromJson(column['name'])] = Categorical(values, [_fromJson(c) for c in column['categories']])
+        os.utime(manifestPath, None)
+        return data
+
+    def store(self, file, data):
+        '''Saves the DataSet data as the entry of file and evicts old entries if needed.'''
+        entry = self._entry(file)
+        temp = entry + '.tmp%d' % os.getpid()
+        shutil.rmtree(temp, ignore_errors=True)
+        os.makedirs(temp)
+        info = os.stat(file)
+        manifest = {'source': os.path.abspath(file), 'size': info.st_size, 'mtime': info.st_mtime,
+                    'sha1': _fileHash(file), 'columns': []}
+        keys = data.keys()
+        for j in range(len(keys)):
+            column = data[keys[j]]
+            name = 'c%d.npy' % j
+            if isinstance(column, Categorical):
+                np.save(os.path.join(temp, name), column.codes)
+                manifest['columns'].append({'name': keys[j], 'file': name, 'categories': column.categories})
+            else:
+                np.save(os.path.join(temp, name), np.asarray(column, dtype=np.float64))
+                manifest['columns'].append({'name': keys[j], 'file': name, 'categories': None})
+        with open(os.path.join(temp, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f)
+        shutil.rmtree(entry, ignore_errors=True)
+        os.rename(temp, entry)
+        self.evict()
+
+    def evict(self):
+        '''Removes the least recently used entries until the cache fits in maxBytes.'''
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            entry = os.path.join(self.directory, name)
+            manifestPath = os.path.join(entry, 'manifest.json')
+            if not os.path.isfile(manifestPath):
+                continue
+            size = sum(os.path.getsize(os.path.join(entry, f)) for f in os.listdir(entry))
+            entries.append((os.path.getmtime(manifestPath), size, entry))
+            total = total + size
+        entries.sort()
+        for used, size, entry in entries:
+            if total <= self.maxBytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total = total - size
+
+    def clear(self):
+        '''Removes every entry of the cache.'''
+        for name in os.listdir(self.directory):
+            shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+
+
+_dataCache = None
+
+
+def setDataCache(directory, maxBytes=2 ** 30):
+    '''This function enables the on-disk cache used by dataRead for every file read afterwards.
+    INPUT: directory of the cache (string), None disables the cache.  maxBytes is the maximum size of
+           the cache directory (int).
+    OUTPUT: The DataCache in use (DataCache).'''
+    global _dataCache
+    if directory is None:
+        _dataCache = None
+    else:
+        _dataCache = DataCache(directory, maxBytes)
+    return _dataCache
+
+
+def _fileHash(file):
+    digest = hashlib.sha1()
+    with open(file, 'rb') as f:
+        for block in iter(lambda: f.read(2 ** 20), ''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _fromJson(value):
+    '''json returns unicode strings, the data sets use the ascii folded str of dataRead.'''
+    if isinstance(value, unicode):
+        return value.encode('ascii')
+    return value
+
+# -----DESCRIPTIVES CACHE-----------------------------------------------------------------------------------------------
+
+
+_DESCRIPTIVE_FIELDS = OrderedDict([('moments', ('n', 'mean', 'variance')), ('shape', ('skew', 'kurtosis')),
+                                   ('levene', ('median', 'levZ', 'levSS')),
+                                   ('normaltest', ('normalStatistic', 'normalP'))])
+
+
+def _columnStats(X, groups):
+    '''Descriptives of every column of X in the field groups of _DESCRIPTIVE_FIELDS: moments (n, mean and
+    sample variance), shape (skewness and excess kurtosis), levene (median, mean absolute deviation from the median
+    levZ and the sum of squares around it levSS, as used by Levene's test) and normaltest (statistic and
+    p-value of scipy's normaltest). Returns a dict of arrays.'''
+    X = np.asarray(X, dtype=np.float64)
+    out = {}
+    if X.shape[0] == 0 and 'normaltest' not in groups:
+        for group in groups:
+            for field in _DESCRIPTIVE_FIELDS[group]:
+                out[field] = np.full(X.shape[1], np.nan)
+        if 'moments' in groups:
+            out['n'] = np.zeros(X.shape[1])
+        return out
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if 'moments' in groups:
+            out['n'] = np.full(X.shape[1], float(X.shape[0]))
+            out['mean'] = X.mean(axis=0)
+            out['variance'] = X.var(axis=0, ddof=1)
+        if 'shape' in groups:
+            D = X - X.mean(axis=0)
+            m2 = (D ** 2).mean(axis=0)
+            out['skew'] = (D ** 3).mean(axis=0) / m2 ** 1.5
+            out['kurtosis'] = (D ** 4).mean(axis=0) / m2 ** 2 - 3
+        if 'levene' in groups:
+            out['median'] = np.median(X, axis=0)
+            Z = np.abs(X - out['median'])
+            out['levZ'] = Z.mean(axis=0)
+            out['levSS'] = ((Z - out['levZ']) ** 2).sum(axis=0)
+        if 'normaltest' in groups:
+            with _span('scipy.normaltest'):
+                out['normalStatistic'], out['normalP'] = stats.normaltest(X, axis=0)
+    return out
+
+
+class DescriptiveCache(object):
+    '''In-memory cache of column descriptives shared by the tests (see _columnStats). An entry is addressed
+    by the sha1 of the values of a data column and the sha1 of the rows used (a group, the rows of a label,
+    or every row), so a column described by a test is a hit for the next tests over the same rows, in the
+    same data or in a copy of it. The values are hashed on every call, so a column changed in place gets new
+    entries instead of the stale ones. The least recently used entries are removed when the cache grows
+    over maxBytes.'''
+
+    def __init__(self, maxBytes=2 ** 24):
+        self.maxBytes = maxBytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def describe(self, X, groups, keys):
+        '''Descriptives of the columns of X in groups (see _columnStats). keys are the addresses of the columns
+        (see _sliceKeys), only the columns without a cached entry for every group are computed. Returns a
+        dict of arrays.'''
+        X = np.asarray(X, dtype=np.float64)
+        fields = [field for group in groups for field in _DESCRIPTIVE_FIELDS[group]]
+        found = {}
+        with self._lock:
+            for key in keys:
+                entry = self.entries.pop(key, None)
+                if entry is not None:
+                    self.entries[key] = entry
+                    if all(field in entry for field in fields):
+                        found[key] = entry
+        missing = [j for j in range(len(keys)) if keys[j] not in found]
+        hits = len(keys) - len(missing)
+        if missing:
+            computed = _columnStats(X if len(missing) == len(keys) else np.ascontiguousarray(X[:, missing]), groups)
+            with self._lock:
+                for i in range(len(missing)):
+                    key = keys[missing[i]]
+                    entry = self.entries.pop(key, {})
+                    self.bytes = self.bytes - self._size(entry)
+                    for field in computed:
+                        entry[field] = computed[field][i]
+                    self.entries[key] = entry
+                    self.bytes = self.bytes + self._size(entry)
+                    found[key] = entry
+                self._evict()
+        with self._lock:
+            self.hits = self.hits + hits
+            self.misses = self.misses + len(missing)
+        _count('descriptive hits', hits)
+        _count('descriptive misses', len(missing))
+        return dict((field, np.array([found[key][field] for key in keys], dtype=np.float64)) for field in fields)
+
+    def invalidate(self, column):
+        '''Removes the entries of every slice of column.'''
+        digest = _columnDigest(column)
+        with self._lock:
+            for key in [key for key in self.entries if key.startswith(digest)]:
+                self.bytes = self.bytes - self._size(self.entries.pop(key))
+
+    def clear(self):
+        '''Removes every entry of the cache.'''
+        with self._lock:
+            self.entries = OrderedDict()
+            self.bytes = 0
+
+    @staticmethod
+    def _size(entry):
+        return 100 + 40 * len(entry) if entry else 0
+
+    def _evict(self):
+        while self.bytes > self.maxBytes and self.entries:
+            key, entry = self.entries.popitem(last=False)
+            self.bytes = self.bytes - self._size(entry)
+
+
+_descriptiveCache = DescriptiveCache()
+
+
+def setDescriptiveCache(maxBytes=2 ** 24):
+    '''This function replaces the cache of column descriptives used by the tests (see DescriptiveCache),
+    which is enabled by default.
+    INPUT: maxBytes is the memory budget of the cache (int), None disables the cache.
+    OUTPUT: The DescriptiveCache in use (DescriptiveCache).'''
+    global _descriptiveCache
+    if maxBytes is None:
+        _descriptiveCache = None
+    else:
+        _descriptiveCache = DescriptiveCache(maxBytes)
+    return _descriptiveCache
+
+
+def _columnDigest(column):
+    '''sha1 of the float64 values of a data column.'''
+    return hashlib.sha1(np.ascontiguousarray(column, dtype=np.float64)).digest()
+
+
+def _columnDigests(data, names):
+    '''Digests of the variables in names as a variables x 20 uint8 array, so they can be shared with the
+    groupMap processes along with the data.'''
+    return np.array([np.frombuffer(_columnDigest(data[name]), dtype=np.uint8) for name in names],
+                    dtype=np.uint8).reshape(len(names), 20)
+
+
+def _sliceKeys(digests, rows=None):
+    '''Cache keys of the columns with digests (see _columnDigests) restricted to rows, a boolean mask or the
+    row numbers, or every row when rows is None.'''
+    suffix = '' if rows is None else hashlib.sha1(np.ascontiguousarray(rows)).digest() + str(np.asarray(rows).dtype)
+    return [digest.tostring() + suffix for digest in digests]
+
+
+def _describe(X, groups, keys=None):
+    if _descriptiveCache is None or keys is None:
+        return _columnStats(X, groups)
+    return _descriptiveCache.describe(X, groups, keys)
 
 # -----DATA IMPORT AND EXPORT FUNCTIONS---------------------------------------------------------------------------------
 
 
-def dataRead(file):
+@_profiled
+def dataRead(file, cache=None):
     '''This function reads an xls file and creates a dictionary containing the variable names and the
-    data stored in each one.
-    INPUT: Xls file route (string).
-    OUTPUT: Excel data stored in a dictionary (dict).'''
-    book = open_workbook(file)
-    sheet = book.sheet_by_index(0)
-    cols = sheet.ncols
-    data = OrderedDict()
-    headers = sheet.row(0)
-    for h in range(len(headers)):
-        if isinstance(headers[h].value, unicode):
-            data[unicodedata.normalize('NFKD', headers[h].value).encode('ascii','ignore')] = []
-    for column in range(cols):
-        col = sheet.col(column)
-        key = col[0].value
-        if isinstance(key, unicode):
-            key = unicodedata.normalize('NFKD', key).encode('ascii', 'ignore')
-        for i in range(1,len(col)):
-            value = col[i].value
-            if isinstance(value, unicode):
-                value = unicodedata.normalize('NFKD', value).encode('ascii', 'ignore')
-            data[key].append(value)
+    data stored in each one. Numeric variables are stored as float64 arrays and text variables as
+    Categorical columns (see DataSet). When a cache is given, or enabled with setDataCache, the parsed
+    data is saved on disk and later reads of the same unchanged file are memory-mapped from it.
+    INPUT: Xls file route (string).  cache is an optional DataCache or cache directory (string).
+    OUTPUT: Excel data stored in a dictionary (DataSet).'''
+    if cache is None:
+        cache = _dataCache
+    elif isinstance(cache, basestring):
+        cache = DataCache(cache)
+    if cache is not None:
+        with _span('dataRead.cacheLoad'):
+            data = cache.load(file)
+        if data is not None:
+            _count('cache hits')
+            return data
+    with _span('xlrd.parse'):
+        book = xlrd.open_workbook(file)
+        sheet = book.sheet_by_index(0)
+    data = DataSet()
+    with _span('dataRead.columns'):
+        for column in range(sheet.ncols):
+            key = _ascii(sheet.cell_value(0, column))
+            text = xlrd.XL_CELL_TEXT in sheet.col_types(column, start_rowx=1)
+            data[key] = _buildColumn(sheet.col_values(column, start_rowx=1), text)
+    _count('rows read', max(sheet.nrows - 1, 0))
+    if cache is not None:
+        with _span('dataRead.cacheStore'):
+            cache.store(file, data)
     return data
 
 
 def exportResult(table, path):
-    '''This function exports a table obtained by an statistical test to an .xlsx file in the designed route.
+    '''This function exports a table obtained by an statistical test to a file in the designed route, the
+    extension of the path selects the format (see exportResults), other extensions are written as xlsx.
     INPUT: Table to export (list) and the path of the file ending with file_name.xlsx (string).
     OUTPUT: Xlsx file saved in the designed route.'''
-    workbook = xls.Workbook(path)
-    worksheet = workbook.add_worksheet()
-    row = 0
-    for i in range(len(table)):
-        data = table[i]
-        for j in range(len(data)):
-            worksheet.write(row, j, data[j])
-        row = row + 1
-    workbook.close()
+    exportResults(OrderedDict([('Sheet1', table)]), path,
+                  _EXPORT_FORMATS.get(os.path.splitext(path)[1].lower(), 'xlsx'))
+
+
+@_profiled
+def exportResults(tables, path, fileFormat=None):
+    '''This function exports several tables at once. Rows are written whole and xlsx workbooks are written
+    in constant memory mode, so the memory used does not depend on the size of the tables. The formats are
+    xlsx (every table in a sheet of one workbook), npz (every column of every table in one archive, as
+    table/column), csv, parquet and arrow (one file per table, named path_table when there are several).
+    Numeric columns are stored as float64 and the other ones as text. parquet and arrow (IPC file, also
+    readable as feather) need the pyarrow package.
+    INPUT: tables contain the tables by name (dict, e.g. returned by runPlan) or in a list, named Table 1,
+           Table 2... (list).  path is the route of the file (string).  fileFormat is 'xlsx', 'csv', 'npz',
+           'parquet' or 'arrow', by default the extension of path (string).
+    OUTPUT: Files saved in the designed route.'''
+    if not isinstance(tables, dict):
+        tables = OrderedDict(('Table ' + str(i + 1), table) for i, table in enumerate(tables))
+    if fileFormat is None:
+        fileFormat = _EXPORT_FORMATS.get(os.path.splitext(path)[1].lower())
+    if fileFormat not in _EXPORT_FORMATS.values():
+        print ('Error: the format must be xlsx, csv, npz, parquet or arrow.')
+        return None
+    _count('tables exported', len(tables))
+    if fileFormat == 'xlsx':
+        _exportXlsx(tables, path)
+    elif fileFormat == 'npz':
+        arrays = OrderedDict()
+        for name, table in tables.items():
+            for column, values in _tableColumns(table).items():
+                arrays[name + '/' + column] = values
+        np.savez(path, **arrays)
+    else:
+        if fileFormat in ('parquet', 'arrow'):
+            try:
+                import pyarrow
+                import pyarrow.parquet
+            except ImportError:
+                print ('Error: ' + fileFormat + ' export needs the pyarrow package.')
+                return None
+        root, extension = os.path.splitext(path)
+        for name, table in tables.items():
+            target = path if len(tables) == 1 else root + '_' + _fileName(name) + extension
+            if fileFormat == 'csv':
+                _exportCsv(table, target)
+            else:
+                arrow = _arrowTable(pyarrow, _tableColumns(table))
+                if fileFormat == 'parquet':
+                    pyarrow.parquet.write_table(arrow, target)
+                else:
+                    sink = pyarrow.OSFile(target, 'wb')
+                    try:
+                        writer = pyarrow.RecordBatchFileWriter(sink, arrow.schema)
+                        writer.write_table(arrow)
+                        writer.close()
+                    finally:
+                        sink.close()
     print "Data saved"
 
-# -----T-TEST FUNCTIONS-------------------------------------------------------------------------------------------------
 
+_EXPORT_FORMATS = {'.xlsx': 'xlsx', '.csv': 'csv', '.npz': 'npz', '.parquet': 'parquet', '.arrow': 'arrow',
+                   '.feather': 'arrow'}
+
+
+def _exportXlsx(tables, path):
+    workbook = xls.Workbook(path, {'constant_memory': True, 'nan_inf_to_errors': True})
+    used = set()
+    for name, table in tables.items():
+        sheet = _fileName(name, '[]:*?/\\')[:31] or 'Sheet'
+        while sheet.lower() in used:
+            sheet = sheet[:27] + '_' + str(len(used))
+        used.add(sheet.lower())
+        worksheet = workbook.add_worksheet(sheet)
+        for row in range(len(table)):
+            worksheet.write_row(row, 0, table[row])
+    workbook.close()
+
+
+def _exportCsv(table, path):
+    with open(path, 'wb') as f:
+        writer = csv.writer(f)
+        for row in table:
+            writer.writerow([_text(value) for value in row])
+
+
+def _fileName(name, invalid='\\/:*?"<>|[] '):
+    name = str(_ascii(name))
+    for char in invalid:
+        name = name.replace(char, '_')
+    return name
+
+
+def _arrowTable(pyarrow, columns):
+    arrays = []
+    for values in columns.values():
+        if values.dtype.kind == 'S':
+            arrays.append(pyarrow.array([value.decode('ascii') for value in values.tolist()], pyarrow.string()))
+        else:
+            arrays.append(pyarrow.array(values))
+    return pyarrow.Table.from_arrays(arrays, list(columns.keys()))
+
+
+def _text(value):
+    if isinstance(value, float):
+        return repr(float(value))
+    return str(_ascii(value))
+
+
+def _tableColumns(table):
+    '''Columns of a table as arrays by header, float64 when every value is a number and text otherwise.'''
+    columns = OrderedDict()
+    for j in range(len(table[0])):
+        name = str(_ascii(table[0][j])) or 'column ' + str(j + 1)
+        while name in columns:
+            name = name + '_'
+        values = [row[j] for row in table[1:]]
+        if all(isinstance(value, (int, long, float, np.number)) and not isinstance(value, bool) for value in values):
+            columns[name] = np.array(values, dtype=np.float64)
+        else:
+            columns[name] = np.array([_text(value) for value in values])
+    return columns
+
+
+def _renderTable(table_matrix):
+    '''PrettyTable of a table_matrix, the first row is the header.'''
+    table = prettytable.PrettyTable(table_matrix[0])
+    for row in range(1, len(table_matrix)):
+        table.add_row(table_matrix[row])
+    return table
+
+# -----RESULTS----------------------------------------------------------------------------------------------------------
+
+
+class ResultTable(object):
+    '''Result of a test function. The values of every test computed are kept in arrays: statistic, pValue,
+    df (degrees of freedom) and effectSize, with the name of each test in labels and, for the grouped
+    tests, its group in groups. Values that do not apply to a test are nan. With a multiple comparison
+    correction (see correctPValues) pAdjusted holds the adjusted p-values and correction its method.
+    The table_matrix list (header first, only the significative rows with printSig) that the functions
+    return is built the first time it is used, and the result behaves as that list, so it can be indexed,
+    iterated and exported as before. The table is only drawn by render, show and export.'''
+    __slots__ = ('labels', 'groups', 'statistic', 'pValue', 'df', 'effectSize', 'pAdjusted', 'correction', '_build',
+                 '_matrix')
+
+    def __init__(self, build, labels, statistic=None, pValue=None, df=None, effectSize=None, groups=None,
+                 pAdjusted=None, correction=None):
+        self.labels = list(labels)
+        self.groups = groups
+        self.statistic = _resultArray(statistic, len(self.labels))
+        self.pValue = _resultArray(pValue, len(self.labels))
+        self.df = _resultArray(df, len(self.labels))
+        self.effectSize = _resultArray(effectSize, len(self.labels))
+        self.pAdjusted = _resultArray(pAdjusted, len(self.labels))
+        self.correction = correction
+        self._build = build
+        self._matrix = None
+
+    @property
+    def table_matrix(self):
+        if self._matrix is None:
+            with _span('table.build'):
+                self._matrix = self._build()
+            self._build = None
+        return self._matrix
+
+    def __len__(self):
+        return len(self.table_matrix)
+
+    def __getitem__(self, item):
+        return self.table_matrix[item]
+
+    def __iter__(self):
+        return iter(self.table_matrix)
+
+    def __eq__(self, other):
+        '''Compares as the table_matrix list: equal to a list or a ResultTable with the same rows.'''
+        if isinstance(other, ResultTable):
+            other = other.table_matrix
+        if not isinstance(other, list):
+            return NotImplemented
+        return self.table_matrix == other
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None
+
+    def __getstate__(self):
+        return (self.labels, self.groups, self.statistic, self.pValue, self.df, self.effectSize, self.pAdjusted,
+                self.correction, self.table_matrix)
+
+    def __setstate__(self, state):
+        (self.labels, self.groups, self.statistic, self.pValue, self.df, self.effectSize, self.pAdjusted,
+         self.correction, self._matrix) = state
+        self._build = None
+
+    def __repr__(self):
+        return '<ResultTable ' + repr(self.table_matrix[0][0]) + ': ' + str(len(self.labels)) + ' tests>'
+
+    def render(self):
+        '''PrettyTable of the result.'''
+        return _renderTable(self.table_matrix)
+
+    def show(self):
+        '''Prints the table in the terminal.'''
+        print self.render()
+
+    def export(self, path):
+        '''Saves the table to an .xlsx file (see exportResult).'''
+        exportResult(self.table_matrix, path)
+
+
+def _resultArray(values, n):
+    if values is None:
+        return np.full(n, np.nan)
+    return np.zeros(n) + np.asarray(values, dtype=np.float64)
+
+
+def _report(result, options):
+    '''Prints a result unless the quiet option is set, and returns it.'''
+    _count('tests', len(result.labels))
+    if not options['quiet']:
+        with _span('table.print'):
+            result.show()
+    return result
+
+# -----STREAMING FUNCTIONS----------------------------------------------------------------------------------------------
+
+
+def _csvRows(file, encoding):
+    with open(file, 'rb') as f:
+        for row in csv.reader(f):
+            yield [cell.decode(encoding) for cell in row]
+
+
+def _xlsxRows(file):
+    from openpyxl import load_workbook
+    book = load_workbook(file, read_only=True, data_only=True)
+    try:
+        for row in book.worksheets[0].iter_rows():
+            yield [cell.value for cell in row]
+    finally:
+        book.close()
+
+
+def _xlsRows(file):
+    sheet = xlrd.open_workbook(file, on_demand=True).sheet_by_index(0)
+    for r in range(sheet.nrows):
+        yield sheet.row_values(r)
+
+
+def dataStream(file, chunkSize=10000, encoding='utf-8'):
+    '''This function reads a csv, xlsx or xls file in chunks of rows, so files larger than memory can be
+    analyzed. Xlsx files are parsed in read-only mode (openpyxl) and csv files line by line, so the memory
+    used is bounded by chunkSize. Xls files are always loaded whole by xlrd and only their conversion is
+    done by chunks. The type of each variable is set by the first chunk: the values of a numeric variable
+    that are not numbers in the next chunks (e.g. NA) are NaN, and a text variable stays a Categorical.
+    INPUT: file route (string).  chunkSize is the number of rows of each chunk (int).  encoding is the
+           text encoding of csv files (string).
+    OUTPUT: Generator of DataSet chunks with the same variables as dataRead.'''
+    extension = os.path.splitext(file)[1].lower()
+    if extension == '.csv':
+        rows = _csvRows(file, encoding)
+    elif extension in ('.xlsx', '.xlsm'):
+        rows = _xlsxRows(file)
+    else:
+        rows = _xlsRows(file)
+    typed = extension != '.csv'
+    headers = [_ascii(h) for h in next(rows, [])]
+    ncols = len(headers)
+    numeric = None
+    chunk = []
+    for row in rows:
+        if len(row) < ncols:
+            row = list(row) + [None] * (ncols - len(row))
+        chunk.append(row)
+        if len(chunk) == chunkSize:
+            data, numeric = _chunkData(headers, chunk, typed, numeric)
+            yield data
+            chunk = []
+    if chunk:
+        yield _chunkData(headers, chunk, typed, numeric)[0]
+
+
+def _chunkData(headers, rows, typed=False, numeric=None):
+    '''DataSet of a chunk of rows and the list of its numeric variables. typed is True when the cells keep
+    their type (workbooks), so text cells are not read as numbers. numeric tells which variables are
+    numeric (from the first chunk), None infers them from the values of this chunk.'''
+    data = DataSet()
+    with _span('dataStream.chunk'):
+        columns = zip(*rows)
+        for j in range(len(headers)):
+            values = list(columns[j])
+            if numeric is None:
+                text = any(isinstance(value, basestring) and value != '' for value in values) if typed else None
+                data[headers[j]] = _buildColumn(values, text)
+            elif numeric[j]:
+                data[headers[j]] = _numericColumn(values)
+            else:
+                data[headers[j]] = _buildCategorical(values)
+        if numeric is None:
+            numeric = [not isinstance(data[headers[j]], Categorical) for j in range(len(headers))]
+    _count('rows streamed', len(rows))
+    return data, numeric
+
+
+@_profiled
+def streamDescriptives(file, chunkSize, *measures, **options):
+    '''This function computes the descriptive statistics of the variables included reading the file by
+    chunks (see dataStream), so the memory used does not depend on the size of the file.
+    INPUT: file route (string).  chunkSize is the number of rows read at once (int).  *measures contain
+           all the variables to describe (strings).  quiet=True skips printing the table.
+    OUTPUT: The function prints a table in the terminal containing the descriptives computed.'''
+    options = _options(options, quiet=False)
+    if not isinstance(chunkSize, (int, long)) or chunkSize < 1:
+        print ('Error: chunkSize must be a positive integer with the number of rows read at once.')
+        return None
+    else:
+        results = OrderedDict()
+        for m in measures:
+            results[m] = RunningMoments()
+        for chunk in dataStream(file, chunkSize):
+            for m in measures:
+                if isinstance(chunk[m], Categorical):
+                    print ('Error: ' + m + ' contains text values, only numeric variables can be described.')
+                    return None
+                results[m].update(chunk[m])
+        table_matrix = [['Descriptives', 'N', 'Mean', 'Std. Deviation', 'Minimum', 'Maximum']]
+        m = results.keys()
+        for k in range(len(m)):
+            res = results[m[k]]
+            table_matrix.append([m[k], res.n, res.mean, res.std(), res.min, res.max])
+        return _report(ResultTable(lambda: table_matrix, m), options)
+
+# -----INCREMENTAL STATISTICS-------------------------------------------------------------------------------------------
+
+
+class PairedMoments(RunningMoments):
+    '''RunningMoments of the differences between two paired variables, updated with new pairs and
+    mergeable, from which the paired T-test is obtained without going back to the data.'''
+
+    def update(self, x, y):
+        '''Adds new pairs, pairs with a missing value are ignored.'''
+        return RunningMoments.update(self, np.asarray(x, dtype=np.float64) - np.asarray(y, dtype=np.float64))
+
+    def ttest(self):
+        '''Paired T-test of the pairs added so far (statistic, p-value).'''
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = self.mean / np.sqrt(self.variance() / self.n)
+        return t, 2 * stats.t.sf(np.abs(t), self.n - 1)
+
+
+class CoMoments(object):
+    '''Count, means and co-moment matrix (sums of cross products of deviations) of several numeric
+    variables, updated with new rows and mergeable, from which covariances and Pearson correlations
+    are obtained without going back to the data. Rows with a missing value are ignored.'''
+
+    def __init__(self, nVariables):
+        self.n = 0
+        self.mean = np.zeros(nVariables)
+        self.C = np.zeros((nVariables, nVariables))
+
+    def update(self, X):
+        '''Adds the rows of X (rows x variables array).'''
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[None, :]
+        X = X[~np.isnan(X).any(axis=1)]
+        if len(X) > 0:
+            chunk = CoMoments(X.shape[1])
+            chunk.n = len(X)
+            chunk.mean = X.mean(axis=0)
+            Xc = X - chunk.mean
+            chunk.C = np.dot(Xc.T, Xc)
+            self.merge(chunk)
+        return self
+
+    def merge(self, other):
+        '''Combines the co-moments of other into these ones.'''
+        n = self.n + other.n
+        if other.n > 0:
+            delta = other.mean - self.mean
+            self.mean = self.mean + delta * other.n / n
+            self.C = self.C + other.C + np.outer(delta, delta) * self.n * other.n / n
+            self.n = n
+        return self
+
+    def covariance(self):
+        return self.C / (self.n - 1)
+
+    def correlation(self):
+        '''Pearson coefficients and p-values of every pair of variables (tuple of arrays).'''
+        with np.errstate(divide='ignore', invalid='ignore'):
+            d = np.sqrt(np.diag(self.C))
+            r = self.C / np.outer(d, d)
+        return r, _correlPValue(r, np.full(r.shape, float(self.n)))
+
+
+class GroupMoments(object):
+    '''RunningMoments of a numeric variable for each category of a grouping variable, updated with new
+    rows and mergeable. The independent T-test, Bartlett's test of equal variances and the one-way
+    ANOVA are obtained from the group counts, means and sums of squares.'''
+
+    def __init__(self):
+        self.groups = OrderedDict()
+
+    def update(self, labels, values):
+        '''Adds new rows, labels are the categories of the rows and values the measure. Missing labels
+        (NaN) are the group '' (see GroupIndex).'''
+        index = GroupIndex(labels)
+        values = np.asarray(values, dtype=np.float64)
+        for g in range(len(index)):
+            self.groups.setdefault(index.categories[g], RunningMoments()).update(index.take(values, g))
+        return self
+
+    def merge(self, other):
+        for label, moments in other.groups.items():
+            self.groups.setdefault(label, RunningMoments()).merge(moments)
+        return self
+
+    def bartlett(self, *labels):
+        '''Bartlett's test of equal variances between the groups in labels (all by default). Unlike
+        Levene's test, which needs the absolute deviations of every value, it only depends on the
+        group variances (statistic, p-value).'''
+        groups = [self.groups[label] for label in (labels or self.groups.keys())]
+        n = np.array([g.n for g in groups], dtype=np.float64)
+        v = np.array([g.variance() for g in groups])
+        k = len(groups)
+        pooled = ((n - 1) * v).sum() / (n.sum() - k)
+        statistic = (((n.sum() - k) * np.log(pooled) - ((n - 1) * np.log(v)).sum()) /
+                     (1 + ((1 / (n - 1)).sum() - 1 / (n.sum() - k)) / (3 * (k - 1))))
+        return statistic, stats.chi2.sf(statistic, k - 1)
+
+    def ttest(self, label1, label2, equalVar=False):
+        '''Independent T-test between two groups (statistic, p-value), Welch's test by default and the
+        pooled variances test with equalVar True. With equalVar None the variances are pooled when the
+        Bartlett p-value is over 0.05: indepTtest chooses by Levene's test instead, so on the same data
+        the two functions may not use the same variant.'''
+        g1 = self.groups[label1]
+        g2 = self.groups[label2]
+        if equalVar is None:
+            equalVar = self.bartlett(label1, label2)[1] > 0.05
+        if equalVar:
+            df = g1.n + g2.n - 2.0
+            se = np.sqrt((g1.m2 + g2.m2) / df * (1.0 / g1.n + 1.0 / g2.n))
+        else:
+            a = g1.variance() / g1.n
+            b = g2.variance() / g2.n
+            df = (a + b) ** 2 / (a ** 2 / (g1.n - 1) + b ** 2 / (g2.n - 1))
+            se = np.sqrt(a + b)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = (g1.mean - g2.mean) / se
+        return t, 2 * stats.t.sf(np.abs(t), df)
+
+    def anova(self):
+        '''One-way ANOVA between all the groups (F, p-value).'''
+        groups = self.groups.values()
+        n = np.array([g.n for g in groups], dtype=np.float64)
+        means = np.array([g.mean for g in groups])
+        grand = (n * means).sum() / n.sum()
+        dfb = len(groups) - 1.0
+        dfw = n.sum() - len(groups)
+        F = ((n * (means - grand) ** 2).sum() / dfb) / (sum(g.m2 for g in groups) / dfw)
+        return F, stats.f.sf(F, dfb, dfw)
+
+# -----MULTIPLE COMPARISONS---------------------------------------------------------------------------------------------
+
+
+CORRECTIONS = ('bonferroni', 'holm', 'hochberg', 'fdr_bh', 'fdr_by')
+
+
+@_profiled
+def correctPValues(p, method='holm'):
+    '''This function adjusts a batch of p-values for multiple comparisons: Bonferroni, Holm (step-down),
+    Hochberg (step-up) and the false discovery rate of Benjamini-Hochberg (fdr_bh) and Benjamini-Yekutieli
+    (fdr_by). The p-values are sorted once and the step-down / step-up adjustments are running maxima /
+    minima over the sorted vector, so the cost is O(m log m) without Python loops. Missing p-values (nan)
+    stay missing and do not count as tests.
+    INPUT: p contain the p-values of the batch, of any shape (array).  method is one of CORRECTIONS (string).
+    OUTPUT: Adjusted p-values, capped at 1, with the shape of p (array).'''
+    if method not in CORRECTIONS:
+        raise ValueError('method must be one of ' + ', '.join(CORRECTIONS))
+    p = np.asarray(p, dtype=np.float64)
+    flat = p.ravel()
+    valid = np.flatnonzero(~np.isnan(flat))
+    out = np.full(flat.shape, np.nan)
+    m = float(len(valid))
+    values = flat[valid]
+    if method == 'bonferroni':
+        adjusted = values * m
+    else:
+        order = np.argsort(values, kind='mergesort')
+        rank = np.arange(1, len(values) + 1, dtype=np.float64)
+        ordered = values[order]
+        if method == 'holm':
+            ordered = np.maximum.accumulate((m - rank + 1) * ordered)
+        elif method == 'hochberg':
+            ordered = np.minimum.accumulate(((m - rank + 1) * ordered)[::-1])[::-1]
+        else:
+            ordered = np.minimum.accumulate((m / rank * ordered)[::-1])[::-1]
+            if method == 'fdr_by':
+                ordered = ordered * (1.0 / rank).sum()
+        adjusted = np.empty_like(ordered)
+        adjusted[order] = ordered
+    out[valid] = np.minimum(adjusted, 1.0)
+    return out.reshape(p.shape)
+
+
+def _adjust(p, correction):
+    if correction is None:
+        return None
+    return correctPValues(p, correction)
+
+
+def _sigHeader(header, adjusted):
+    '''Header of a table, with the adjusted p-value column when there are adjusted p-values.'''
+    return header if adjusted is None else header + ['Adj. p-Value']
+
+
+def _sigRow(row, adjusted, i):
+    '''Row of a table ending with the p-value used for the significance, the adjusted one when given.'''
+    return row if adjusted is None else row + [adjusted[i]]
+
+# -----T-TEST FUNCTIONS-------------------------------------------------------------------------------------------------
+
+
+def pairedTtestBatch(X, Y):
+    '''This function computes the paired T-test between each column of X and the same column of Y at once.
+    INPUT: X and Y are rows x tests arrays with the paired measures (array).
+    OUTPUT: Test statistics and p-values of every column (tuple of arrays).'''
+    D = np.asarray(X, dtype=np.float64) - np.asarray(Y, dtype=np.float64)
+    n = D.shape[0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = D.mean(axis=0) / np.sqrt(D.var(axis=0, ddof=1) / n)
+    with _span('scipy.t'):
+        return t, 2 * stats.t.sf(np.abs(t), n - 1)
+
+
+@_profiled
+def pairwiseTtest(X, maxBytes=2 ** 27):
+    '''This function computes the paired T-test between every pair of columns of X. Each unordered pair is
+    computed once, by chunks of pairs so the arrays of a chunk never take more than maxBytes: each chunk
+    holds four rows x pairs arrays at once, the two columns of every pair, their differences and the
+    deviations from the mean difference computed by the variance.
+    INPUT: X is a rows x variables array (array).  maxBytes is the memory limit of each chunk (int).
+    OUTPUT: variables x variables arrays of test statistics and p-values, t[j, i] = -t[i, j] (tuple).'''
+    X = np.asarray(X, dtype=np.float64)
+    k = X.shape[1]
+    t = np.zeros((k, k))
+    p = np.ones((k, k))
+    rows, cols = np.triu_indices(k, 1)
+    chunk = max(1, maxBytes // (32 * max(1, X.shape[0])))
+    for c in range(0, len(rows), chunk):
+        i = rows[c:c + chunk]
+        j = cols[c:c + chunk]
+        t[i, j], p[i, j] = pairedTtestBatch(X[:, i], X[:, j])
+    t = t - t.T
+    p = np.triu(p, 1) + np.triu(p, 1).T + np.diag(np.diag(p))
+    return t, p
+
+
+@_profiled
+def pairedTtest(data, printSig, *measures, **options):
+    '''This function computes the paired T-test for pairs of measures from data dictionary.
+    INPUT: data is the dictionary containing the data names and values (dict).  printSig is
+           a boolean variable, True: the function only prints the significative results, False:
+           the function prints all the values (bool).  *measures contain all the pairs of
+           variables to compare (strings).  quiet=True skips printing the table.
+           correction ('bonferroni', 'holm', 'hochberg', 'fdr_bh', 'fdr_by') adjusts
+           the p-values of the batch and printSig uses the adjusted ones (see correctPValues).
+    OUTPUT: The function prints a table in the terminal containing all the tests computed and returns
+            the results, with Cohen's dz as effect size (ResultTable).'''
+    options = _options(options, quiet=False, correction=None)
+    result = None
+    if not isinstance(data, dict):
+        print ('Error: data must be a dict. Use dataRead function to import your excel data.')
+    else:
+        if not isinstance(printSig, bool):
+            print ('Error: printSig must be a bool. True: the function only prints the siginificative results/ False: '
+                   'the function prints all the results.')
+        else:
+            if len(measures) % 2 == 0:
+                X = _dataMatrix(data, measures[0::2])
+                t, p = pairedTtestBatch(X, _dataMatrix(data, measures[1::2]))
+                result = _report(_pairedResult(measures, t, p, X.shape[0], printSig, options['correction']),
+                                 options)
+            else:
+                print('Error: Measures must be paired two by two')
+    return result
+
+
+def _pairedTable(measures, t, p, printSig, adjusted=None):
+    '''Rows of the paired T-test table for the pairs of measures, a repeated pair keeps its first place.
+    The adjusted p-values, when given, are added as the last column and used by printSig.'''
+    results = OrderedDict()
+    for i in range(0, len(measures), 2):
+        results[measures[i] + '/' + measures[i + 1]] = _sigRow([t[i // 2], p[i // 2]], adjusted, i // 2)
+    table_matrix = [_sigHeader(['Paired T-test', 'Test Statistic', 'p-Value'], adjusted)]
+    for testName, res in results.items():
+        if not printSig or res[-1] < 0.05:
+            table_matrix.append([testName] + res)
+    return table_matrix
+
+
+def _pairedLabels(measures):
+    return [measures[i] + '/' + measures[i + 1] for i in range(0, len(measures), 2)]
+
+
+def _pairedResult(measures, t, p, n, printSig, correction=None):
+    '''Paired T-test results of n subjects, the effect size is Cohen's dz.'''
+    adjusted = _adjust(p, correction)
+    return ResultTable(lambda: _pairedTable(measures, t, p, printSig, adjusted), _pairedLabels(measures), t, p,
+                       n - 1, t / np.sqrt(n), pAdjusted=adjusted, correction=correction)
+
+
+def _labelMask(column, label):
+    '''Boolean mask of the rows of column equal to label.'''
+    if isinstance(column, Categorical):
+        return column == label
+    return np.array([value == label for value in column], dtype=bool)
+
+
+def indepTtestBatch(G1, G2, keys=None):
+    '''This function computes Levene's test (median centered, as scipy) and the independent T-test of every
+    column of G1 against the same column of G2 in one vectorized pass. The T-test pools the variances
+    when the Levene p-value is over 0.05 and uses Welch's test otherwise. The means, variances and Levene
+    terms of each column are taken from the descriptives cache when the keys of the columns are given.
+    INPUT: G1 and G2 are the rows of each group x measures arrays (array).  keys are the cache keys of the
+           columns of G1 and of G2 (tuple of lists, see DescriptiveCache).
+    OUTPUT: 5 x measures array with the Levene statistic and p-value, the T statistic and p-value and the
+            degrees of freedom of the T-test (array).'''
+    G1 = np.asarray(G1, dtype=np.float64)
+    G2 = np.asarray(G2, dtype=np.float64)
+    n1 = np.float64(G1.shape[0])
+    n2 = np.float64(G2.shape[0])
+    d1 = _describe(G1, ('moments', 'levene'), keys and keys[0])
+    d2 = _describe(G2, ('moments', 'levene'), keys and keys[1])
+    out = np.empty((5, G1.shape[1]))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z1 = d1['levZ']
+        z2 = d2['levZ']
+        z = (n1 * z1 + n2 * z2) / (n1 + n2)
+        within = d1['levSS'] + d2['levSS']
+        out[0] = (n1 + n2 - 2) * (n1 * (z1 - z) ** 2 + n2 * (z2 - z) ** 2) / within
+        with _span('scipy.f'):
+            out[1] = stats.f.sf(out[0], 1, n1 + n2 - 2)
+        m1 = d1['mean']
+        m2 = d2['mean']
+        v1 = d1['variance'] / n1
+        v2 = d2['variance'] / n2
+        equalVar = out[1] > 0.05
+        pooled = ((n1 - 1) * v1 * n1 + (n2 - 1) * v2 * n2) / (n1 + n2 - 2) * (1 / n1 + 1 / n2)
+        welchDf = (v1 + v2) ** 2 / (v1 ** 2 / (n1 - 1) + v2 ** 2 / (n2 - 1))
+        out[2] = (m1 - m2) / np.sqrt(np.where(equalVar, pooled, v1 + v2))
+        out[4] = np.where(equalVar, n1 + n2 - 2, welchDf)
+        with _span('scipy.t'):
+            out[3] = 2 * stats.t.sf(np.abs(out[2]), out[4])
+    return out
+
+
+@_profiled
+def indepTtest(data, printSig, groupBy, *measures, **options):
+    '''This function computes the independent T-test for measures grouped by groupBy from data dictionary.
+    The rows of both groups are selected once for all the measures, which are tested at once (see
+    indepTtestBatch).
+    INPUT: data is the dictionary containing the data names and values (dict).  printSig is a boolean
+           variable, True: the function only prints the significative results, False: the function
+           prints all the values (bool).  groupBy is a list that contains 3 values, the first is the
+           grouping variable, the second and the third are the groups to differentiate (list).  *measures
+           contain all the pairs of variables to compare (strings).  quiet=True skips printing the table.
+           correction ('bonferroni', 'holm', 'hochberg', 'fdr_bh', 'fdr_by') adjusts
+           the p-values of the batch and printSig uses the adjusted ones (see correctPValues).
+    OUTPUT: The function prints a table in the terminal containing all the tests computed and returns
+            the results, with Cohen's d as effect size (ResultTable).'''
+    options = _options(options, quiet=False, correction=None)
+    result = None
+    if not isinstance(data, dict):
+        print ('Error: data must be a dict. Use dataRead function to import your excel data.')
+    else:
+        if not isinstance(printSig, bool):
+            print ('Error: printSig must be a bool. True: the function only prints the siginificative results/ False: '
+                   'the function prints all the results.')
+        else:
+            if not isinstance(groupBy, list) and len(groupBy) == 3:
+                print('Error: groupBy must be a list with three elements, the first one is the variable of grouping,'
+                      ' the second and the third are the groups to compare.')
+            else:
+                X = _dataMatrix(data, measures)
+                g1 = _labelMask(data[groupBy[0]], groupBy[1])
+                g2 = _labelMask(data[groupBy[0]], groupBy[2])
+                digests = _columnDigests(data, measures)
+                res = indepTtestBatch(X[g1], X[g2], (_sliceKeys(digests, g1), _sliceKeys(digests, g2)))
+                result = _report(_indepResult(groupBy, measures, res, g1.sum(), g2.sum(), printSig,
+                                              options['correction']), options)
+    return result
+
+
+def _indepLabels(groupBy, measures):
+    return [measure + ' (' + groupBy[1] + '/' + groupBy[2] + ')' for measure in measures]
+
+
+def _indepResults(groupBy, measures, res, adjusted=None):
+    '''Levene and T-test results of each measure by test name, from the indepTtestBatch array, with the
+    adjusted p-value last when given.'''
+    results = OrderedDict()
+    labels = _indepLabels(groupBy, measures)
+    for i in range(len(measures)):
+        results[labels[i]] = _sigRow([res[0, i], res[1, i], res[2, i], res[3, i]], adjusted, i)
+    return results
+
+
+def _indepResult(groupBy, measures, res, n1, n2, printSig, correction=None):
+    '''Independent T-test results of groups of n1 and n2 subjects, the effect size is Cohen's d.'''
+    adjusted = _adjust(res[3], correction)
+    return ResultTable(lambda: _indepTable(groupBy, measures, res, printSig, adjusted),
+                       _indepLabels(groupBy, measures), res[2], res[3], res[4], res[2] * np.sqrt(1.0 / n1 + 1.0 / n2),
+                       pAdjusted=adjusted, correction=correction)
+
+
+def _indepTable(groupBy, measures, res, printSig, adjusted=None):
+    '''Rows of the independent T-test table from the indepTtestBatch array.'''
+    table_matrix = [_sigHeader(['Independent T-test', 'Levene Statistic', 'Levene p-Value', 'Test Statistic',
+                                'p-Value'], adjusted)]
+    for testName, row in _indepResults(groupBy, measures, res, adjusted).items():
+        if not printSig or row[-1] < 0.05:
+            table_matrix.append([testName] + row)
+    return table_matrix
+
+# -----CORRELATION TEST FUNCTIONS---------------------------------------------------------------------------------------
+
+
+def _pearsonBlock(Xi, Xj, Mi, Mj):
+    '''Pairwise complete Pearson coefficients and number of pairs between the columns of Xi and Xj.
+    Xi and Xj are centered with missing values set to 0, Mi and Mj are the float masks of present values,
+    or None when there are no missing values and the columns are standardized.'''
+    if Mi is None:
+        return np.dot(Xi.T, Xj), np.full((Xi.shape[1], Xj.shape[1]), float(len(Xi)))
+    n = np.dot(Mi.T, Mj)
+    sx = np.dot(Xi.T, Mj)
+    sy = np.dot(Mi.T, Xj)
+    sxx = np.dot((Xi ** 2).T, Mj)
+    syy = np.dot(Mi.T, Xj ** 2)
+    sxy = np.dot(Xi.T, Xj)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r = (sxy - sx * sy / n) / np.sqrt((sxx - sx ** 2 / n) * (syy - sy ** 2 / n))
+    return r, n
+
+
+def _correlPValue(r, n):
+    '''Two sided p-values of correlation coefficients r over n pairs from the t distribution.'''
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r = np.clip(r, -1.0, 1.0)
+        df = n - 2
+        t = np.abs(r) * np.sqrt(df / ((1.0 - r) * (1.0 + r)))
+        with _span('scipy.t'):
+            p = 2 * stats.t.sf(t, df)
+    return np.where(df > 0, p, np.nan)
+
+
+def _rankColumns(X):
+    ranks = np.empty_like(X)
+    with _span('scipy.rankdata'):
+        for j in range(X.shape[1]):
+            ranks[:, j] = stats.rankdata(X[:, j])
+    return ranks
+
+
+def correlationBlocks(X, method='pearson', blockSize=256):
+    '''This function computes the correlations between all the columns of X by square blocks of columns,
+    so only blockSize x blockSize matrices are built at once. Pearson (and Spearman, over ranks) blocks
+    come from matrix products of the standardized columns; pairs with missing values (NaN) use the
+    pairwise complete observations. Spearman pairs with missing values and Kendall pairs are computed by
+    scipy pair by pair.
+    INPUT: X is a rows x variables array (array).  method is 'pearson', 'spearman' or 'kendall' (string).
+           blockSize is the number of columns of each block (int).
+    OUTPUT: Generator of (i0, j0, r, p, n) blocks for j0 >= i0, r, p and n are the coefficients, p-values
+            and number of pairs between columns i0: i0 + len(r) and j0: j0 + len(r[0]).'''
+    if method not in ('pearson', 'spearman', 'kendall'):
+        raise ValueError('method must be pearson, spearman or kendall')
+    X = np.asarray(X, dtype=np.float64)
+    k = X.shape[1]
+    columns = _correlColumns(X, method, np.isnan(X).any())
+    for i0 in range(0, k, blockSize):
+        i1 = min(i0 + blockSize, k)
+        for j0 in range(i0, k, blockSize):
+            j1 = min(j0 + blockSize, k)
+            r, p, n = _correlBlock(_correlSlice(columns, i0, i1), _correlSlice(columns, j0, j1), method, i0 == j0)
+            yield i0, j0, r, p, n
+
+
+def _correlColumns(X, method, masked):
+    '''Columns of X prepared for _correlBlock as (X, Z, M, missing, hasMissing). For pearson and spearman (over
+    ranks) Z holds the centered columns with missing values set to 0 and M the float masks of present values
+    when masked, or the standardized columns and None otherwise. masked must be the same for all the columns
+    of the blocks computed together (any missing value in any of them).'''
+    missing = np.isnan(X)
+    hasMissing = missing.any(axis=0)
+    Z = M = None
+    if method != 'kendall':
+        Z = X
+        if method == 'spearman':
+            Z = _rankColumns(np.where(missing, 0.0, X))
+            Z[missing] = np.nan
+        if masked:
+            M = (~missing).astype(np.float64)
+            Z = np.where(missing, 0.0, Z - np.nanmean(Z, axis=0))
+        else:
+            Z = Z - Z.mean(axis=0)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                Z = Z / np.sqrt((Z ** 2).sum(axis=0))
+    return X, Z, M, missing, hasMissing
+
+
+def _correlSlice(columns, c0, c1):
+    return tuple(None if values is None else values[..., c0:c1] for values in columns)
+
+
+def _correlBlock(a, b, method, diagonal):
+    '''Coefficients, p-values and number of pairs between the prepared columns a and b (see _correlColumns),
+    diagonal is True when a and b are the same columns.'''
+    Xa, Za, Ma, missingA, hasA = a
+    Xb, Zb, Mb, missingB, hasB = b
+    if method == 'kendall':
+        r = np.zeros((Xa.shape[1], Xb.shape[1]))
+        p = np.zeros((Xa.shape[1], Xb.shape[1]))
+        n = np.zeros((Xa.shape[1], Xb.shape[1]))
+        with _span('scipy.kendalltau'):
+            for i in range(Xa.shape[1]):
+                for j in range(i if diagonal else 0, Xb.shape[1]):
+                    pair = ~(missingA[:, i] | missingB[:, j])
+                    r[i, j], p[i, j] = stats.kendalltau(Xa[pair, i], Xb[pair, j])
+                    n[i, j] = pair.sum()
+        if diagonal:
+            r = np.triu(r) + np.triu(r, 1).T
+            p = np.triu(p) + np.triu(p, 1).T
+            n = np.triu(n) + np.triu(n, 1).T
+    else:
+        r, n = _pearsonBlock(Za, Zb, Ma, Mb)
+        p = _correlPValue(r, n)
+        if method == 'spearman' and (hasA.any() or hasB.any()):
+            with _span('scipy.spearmanr'):
+                for i in range(Xa.shape[1]):
+                    for j in range(Xb.shape[1]):
+                        if hasA[i] or hasB[j]:
+                            pair = ~(missingA[:, i] | missingB[:, j])
+                            r[i, j], p[i, j] = stats.spearmanr(Xa[pair, i], Xb[pair, j])
+                            n[i, j] = pair.sum()
+    return r, p, n
+
+
+@_profiled
+def correlationMatrix(X, method='pearson', blockSize=256):
+    '''This function computes the correlation matrix of the columns of X (see correlationBlocks).
+    INPUT: X is a rows x variables array (array).  method is 'pearson', 'spearman' or 'kendall' (string).
+           blockSize is the number of columns computed at once (int).
+    OUTPUT: Coefficients, p-values and number of pairs as variables x variables arrays (tuple).'''
+    k = np.shape(X)[1]
+    r = np.empty((k, k))
+    p = np.empty((k, k))
+    n = np.empty((k, k))
+    for i0, j0, rb, pb, nb in correlationBlocks(X, method, blockSize):
+        i1 = i0 + rb.shape[0]
+        j1 = j0 + rb.shape[1]
+        r[i0:i1, j0:j1] = rb
+        p[i0:i1, j0:j1] = pb
+        n[i0:i1, j0:j1] = nb
+        r[j0:j1, i0:i1] = rb.T
+        p[j0:j1, i0:i1] = pb.T
+        n[j0:j1, i0:i1] = nb.T
+    return r, p, n
+
+
+def _correlTable(title, method, data, printSig, measures, options):
+    options = _options(options, quiet=False, correction=None)
+    result = None
+    if not isinstance(data, dict):
+        print ('Error: data must be a dict. Use dataRead function to import your excel data.')
+    else:
+        if not isinstance(printSig, bool):
+            print ('Error: printSig must be a bool. True: the function only prints the siginificative results/ False: '
+                   'the function prints all the results.')
+        else:
+            if not  len(measures) >= 2:
+                print('Error: At least two measures are necessary to compute correlation.')
+            else:
+                r, p, n = correlationMatrix(_dataMatrix(data, measures), method)
+                result = _report(_correlResult(title, measures, r, p, n, printSig, options['correction']), options)
+    return result
+
+
+def _correlResult(title, measures, r, p, n, printSig, correction=None):
+    '''Correlation results of every pair of measures, the coefficient is also the effect size.'''
+    i, j = np.triu_indices(len(measures), 1)
+    labels = [measures[a] + '/' + measures[b] for a, b in zip(i, j)]
+    adjusted = _adjust(p[i, j], correction)
+    return ResultTable(lambda: _correlRows(title, measures, r, p, printSig, adjusted), labels, r[i, j], p[i, j],
+                       n[i, j] - 2, r[i, j], pAdjusted=adjusted, correction=correction)
+
+
+def _correlRows(title, measures, r, p, printSig, adjusted=None):
+    '''Rows of a correlation table for every pair of measures from their correlation and p-value matrices,
+    adjusted holds the adjusted p-values of the pairs in the same order when given.'''
+    table_matrix = [_sigHeader([title, 'Correl. coefficient', 'p-Value'], adjusted)]
+    for k, (i, j) in enumerate(itertools.combinations(range(len(measures)), 2)):
+        row = _sigRow([measures[i] + '/' + measures[j], r[i, j], p[i, j]], adjusted, k)
+        if not printSig or row[-1] < 0.05:
+            table_matrix.append(row)
+    return table_matrix
+
+
+@_profiled
+def pearsonCorrel(data, printSig, *measures, **options):
+    '''This function computes the Pearson correlation over all the possible pairs of the variables included.
+    All the coefficients are obtained at once from the correlation matrix (see correlationMatrix), missing
+    values are excluded pair by pair.
+    INPUT: data is the dictionary containing the data names and values (dict).  printSig is a boolean
+           variable, True: the function only prints the significative results, False: the function
+           prints all the values (bool). *measures contain all the variables to compare (strings).
+           quiet=True skips printing the table.
+           correction ('bonferroni', 'holm', 'hochberg', 'fdr_bh', 'fdr_by') adjusts
+           the p-values of the batch and printSig uses the adjusted ones (see correctPValues).
+    OUTPUT: The function prints a table in the terminal containing all the tests computed and returns
+            the results (ResultTable).'''
+    return _correlTable('Pearson correlation', 'pearson', data, printSig, measures, options)
+
+
+@_profiled
+def spearmanCorrel(data, printSig, *measures, **options):
+    '''This function computes the Spearman rank correlation over all the possible pairs of the variables
+    included.
+    INPUT: data is the dictionary containing the data names and values (dict).  printSig is a boolean
+           variable, True: the function only prints the significative results, False: the function
+           prints all the values (bool). *measures contain all the variables to compare (strings).
+           quiet=True skips printing the table.
+           correction ('bonferroni', 'holm', 'hochberg', 'fdr_bh', 'fdr_by') adjusts
+           the p-values of the batch and printSig uses the adjusted ones (see correctPValues).
+    OUTPUT: The function prints a table in the terminal containing all the tests computed and returns
+            the results (ResultTable).'''
+    return _correlTable('Spearman correlation', 'spearman', data, printSig, measures, options)
+
+
+@_profiled
+def kendallCorrel(data, printSig, *measures, **options):
+    '''This function computes the Kendall tau correlation over all the possible pairs of the variables
+    included.
+    INPUT: data is the dictionary containing the data names and values (dict).  printSig is a boolean
+           variable, True: the function only prints the significative results, False: the function
+           prints all the values (bool). *measures contain all the variables to compare (strings).
+           quiet=True skips printing the table.
+           correction ('bonferroni', 'holm', 'hochberg', 'fdr_bh', 'fdr_by') adjusts
+           the p-values of the batch and printSig uses the adjusted ones (see correctPValues).
+    OUTPUT: The function prints a table in the terminal containing all the tests computed and returns
+            the results (ResultTable).'''
+    return _correlTable('Kendall correlation', 'kendall', data, printSig, measures, options)
+
+# -----RESAMPLING TEST FUNCTIONS----------------------------------------------------------------------------------------
+
+
+RESAMPLING_BLOCK = 10000
+
+
+def _batches(size, bytesPerReplicate, maxBytes):
+    '''Bounds of the batches of replicates whose temporary arrays fit in maxBytes.'''
+    step = max(1, int(maxBytes // max(1, bytesPerReplicate)))
+    return [(b, min(b + step, size)) for b in range(0, size, step)]
+
+
+def _extreme(statistics, observed):
+    '''Number of replicates at least as extreme as the observed statistic (two sided).'''
+    return int((np.abs(statistics) >= np.abs(observed) * (1 - 1e-12)).sum())
+
+
+def _indepT(s1, q1, n1, s2, q2, n2, equalVar):
+    '''Independent T statistic from the sums and sums of squares of both groups.'''
+    m1 = s1 / n1
+    m2 = s2 / n2
+    v1 = (q1 - s1 * m1) / (n1 - 1)
+    v2 = (q2 - s2 * m2) / (n2 - 1)
+    if equalVar:
+        se = np.sqrt(((n1 - 1) * v1 + (n2 - 1) * v2) / (n1 + n2 - 2) * (1.0 / n1 + 1.0 / n2))
+    else:
+        se = np.sqrt(v1 / n1 + v2 / n2)
+    return (m1 - m2) / se
+
+
+def _pairedShard(samples, size, seed, maxBytes):
+    '''Sign flip permutations of the paired differences and bootstrap replicates of their mean.'''
+    d, = samples
+    n = len(d)
+    rng, bootRng = np.random.RandomState(seed[0]), np.random.RandomState(seed[1])
+    sumsq = (d ** 2).sum()
+    observed = d.mean() / np.sqrt(d.var(ddof=1) / n)
+    count = 0
+    boot = np.empty(size)
+    for b0, b1 in _batches(size, 16 * n, maxBytes):
+        signs = rng.randint(0, 2, (b1 - b0, n)) * 2.0 - 1.0
+        means = np.dot(signs, d) / n
+        t = means / np.sqrt((sumsq - n * means ** 2) / (n - 1) / n)
+        count = count + _extreme(t, observed)
+        boot[b0:b1] = d[bootRng.randint(0, n, (b1 - b0, n))].mean(axis=1)
+    return count, boot
+
+
+def _indepShard(samples, size, seed, maxBytes):
+    '''Label permutations of the pooled groups and bootstrap replicates of the difference of means.'''
+    x, y, equalVar = samples
+    z = np.concatenate((x, y))
+    n1 = len(x)
+    n2 = len(y)
+    rng, bootRng = np.random.RandomState(seed[0]), np.random.RandomState(seed[1])
+    total = z.sum()
+    totalSq = (z ** 2).sum()
+    observed = _indepT(x.sum(), (x ** 2).sum(), n1, y.sum(), (y ** 2).sum(), n2, equalVar)
+    count = 0
+    boot = np.empty(size)
+    for b0, b1 in _batches(size, 24 * len(z), maxBytes):
+        g1 = z[rng.rand(b1 - b0, len(z)).argsort(axis=1)[:, :n1]]
+        s1 = g1.sum(axis=1)
+        q1 = (g1 ** 2).sum(axis=1)
+        t = _indepT(s1, q1, n1, total - s1, totalSq - q1, n2, equalVar)
+        count = count + _extreme(t, observed)
+        u = bootRng.rand(b1 - b0, len(z))
+        boot[b0:b1] = (x[(u[:, :n1] * n1).astype(int)].mean(axis=1) -
+                       y[(u[:, n1:] * n2).astype(int)].mean(axis=1))
+    return count, boot
+
+
+def _correlShard(samples, size, seed, maxBytes):
+    '''Permutations of one variable and bootstrap replicates of the pairs for the Pearson coefficient.'''
+    x, y = samples
+    n = len(x)
+    rng, bootRng = np.random.RandomState(seed[0]), np.random.RandomState(seed[1])
+    zx = (x - x.mean()) / np.sqrt(((x - x.mean()) ** 2).sum())
+    zy = (y - y.mean()) / np.sqrt(((y - y.mean()) ** 2).sum())
+    observed = np.dot(zx, zy)
+    count = 0
+    boot = np.empty(size)
+    for b0, b1 in _batches(size, 32 * n, maxBytes):
+        r = np.dot(zx[rng.rand(b1 - b0, n).argsort(axis=1)], zy)
+        count = count + _extreme(r, observed)
+        rows = bootRng.randint(0, n, (b1 - b0, n))
+        xb = x[rows]
+        yb = y[rows]
+        xb = xb - xb.mean(axis=1)[:, None]
+        yb = yb - yb.mean(axis=1)[:, None]
+        boot[b0:b1] = (xb * yb).sum(axis=1) / np.sqrt((xb ** 2).sum(axis=1) * (yb ** 2).sum(axis=1))
+    return count, boot
+
+
+def _resamplingTask(task):
+    shard, samples, size, seed, maxBytes = task
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return shard(samples, size, seed, maxBytes)
+
+
+@_profiled
+def resamplingEngine(shard, samples, resamples=10000, seed=None, pool=None, maxBytes=2 ** 26):
+    '''This function runs a permutation test and a bootstrap over the samples. The replicates are split in
+    blocks of RESAMPLING_BLOCK, each with its own permutation and bootstrap random streams seeded from
+    seed, so the results for a seed are the same whether the blocks run sequentially or in a process
+    pool. Inside a block the replicates are computed in vectorized batches whose temporary arrays fit
+    in maxBytes, the batch size does not change the results either.
+    INPUT: shard is _pairedShard, _indepShard or _correlShard (function).  samples contain the arrays of
+           the test (tuple).  resamples is the number of permutations and of bootstrap replicates (int).
+           seed is the random seed (int).  pool is an optional multiprocessing Pool (Pool).  maxBytes is
+           the memory limit of a batch (int).
+    OUTPUT: Permutation p-value and the bootstrap replicates of the effect (tuple).'''
+    tasks = _resamplingTasks(shard, samples, resamples, seed, maxBytes)
+    if pool is not None and len(tasks) > 1:
+        results = pool.map(_resamplingTask, tasks)
+    else:
+        results = [_resamplingTask(task) for task in tasks]
+    return _resamplingResult(results, resamples)
+
+
+def _resamplingTasks(shard, samples, resamples, seed, maxBytes):
+    '''Tasks of the blocks of a test (see resamplingEngine).'''
+    sizes = [min(RESAMPLING_BLOCK, resamples - b) for b in range(0, resamples, RESAMPLING_BLOCK)]
+    seeds = np.random.RandomState(seed).randint(0, 2 ** 31 - 1, size=(len(sizes), 2))
+    return [(shard, samples, sizes[i], seeds[i], maxBytes) for i in range(len(sizes))]
+
+
+def _resamplingResult(results, resamples):
+    '''Permutation p-value and bootstrap replicates of a test from the results of its blocks.'''
+    _count('resamples', 2 * resamples)
+    count = sum(res[0] for res in results)
+    boot = np.concatenate([res[1] for res in results])
+    return (count + 1.0) / (resamples + 1.0), boot
+
+
+def _resamplingTable(header, tests, printSig, options):
+    '''Runs every (name, statistic, shard, samples) test and builds the table of its results. The blocks of
+    every test are mapped at once over a pool of workers processes, so the tests run in parallel even when
+    each one is a single block.'''
+    seeds = np.random.RandomState(options['seed']).randint(0, 2 ** 31 - 1, size=max(1, len(tests)))
+    blocks = [_resamplingTasks(tests[i][2], tests[i][3], options['resamples'], seeds[i], options['maxBytes'])
+              for i in range(len(tests))]
+    tasks = [task for testTasks in blocks for task in testTasks]
+    if options['workers'] > 1 and len(tasks) > 1:
+        pool = multiprocessing.Pool(min(options['workers'], len(tasks)))
+        try:
+            results = pool.map(_resamplingTask, tasks)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = [_resamplingTask(task) for task in tasks]
+    rows = []
+    start = 0
+    for i in range(len(tests)):
+        name, statistic, shard, samples = tests[i]
+        pVal, boot = _resamplingResult(results[start:start + len(blocks[i])], options['resamples'])
+        start = start + len(blocks[i])
+        low, high = np.percentile(boot[~np.isnan(boot)], [2.5, 97.5])
+        rows.append([name, statistic, pVal, low, high])
+    pValues = np.array([row[2] for row in rows])
+    adjusted = _adjust(pValues, options['correction'])
+    table_matrix = [_sigHeader(header, adjusted)]
+    for i in range(len(rows)):
+        row = _sigRow(rows[i], adjusted, i)
+        if not printSig or row[-1] < 0.05:
+            table_matrix.append(row)
+    return _report(ResultTable(lambda: table_matrix, [row[0] for row in rows], [row[1] for row in rows], pValues,
+                               pAdjusted=adjusted, correction=options['correction']), options)
+
+
+def _present(*columns):
+    keep = np.ones(len(columns[0]), dtype=bool)
+    for column in columns:
+        keep = keep & ~np.isnan(column)
+    return [column[keep] for column in columns]
 
-def pairedTtest(data, printSig, *measures):
-    '''This function computes the paired T-test for pairs of measures from data dictionary.
+
+@_profiled
+def pairedPermutationTest(data, printSig, *measures, **options):
+    '''This function computes the paired T-test for pairs of measures with a sign flip permutation p-value
+    and a bootstrap 95% confidence interval of the mean difference (see resamplingEngine).
     INPUT: data is the dictionary containing the data names and values (dict).  printSig is
            a boolean variable, True: the function only prints the significative results, False:
            the function prints all the values (bool).  *measures contain all the pairs of
-           variables to compare (strings).
+           variables to compare (strings).  Options: resamples (int, 10000), seed (int), workers (int)
+           and maxBytes (int) (see resamplingEngine).  quiet=True skips printing the table.
+           correction ('bonferroni', 'holm', 'hochberg', 'fdr_bh', 'fdr_by') adjusts
+           the p-values of the batch and printSig uses the adjusted ones (see correctPValues).
     OUTPUT: The function prints a table in the terminal containing all the tests computed.'''
+    options = _options(options, resamples=10000, seed=None, workers=1, maxBytes=2 ** 26, quiet=False,
+                       correction=None)
     if not isinstance(data, dict):
         print ('Error: data must be a dict. Use dataRead function to import your excel data.')
+    elif not isinstance(printSig, bool):
+        print ('Error: printSig must be a bool. True: the function only prints the siginificative results/ False: '
+               'the function prints all the results.')
+    elif len(measures) % 2 != 0:
+        print('Error: Measures must be paired two by two')
     else:
-        if not isinstance(printSig, bool):
-            print ('Error: printSig must be a bool. True: the function only prints the siginificative results/ False: '
-                   'the function prints all the results.')
-        else:
-            if len(measures) % 2 == 0:
-                results = OrderedDict()
-                for i in range(0,len(measures), 2):
-                    testName = measures[i] + '/' + measures[i + 1]
-                    res = stats.ttest_rel(data[measures[i]], data[measures[i + 1]])
-                    results[testName] = res
-                table_matrix = [['Paired T-test', 'Test Statistic', 'p-Value']]
-                if printSig:
-                    m = results.keys()
-                    for k in range(len(m)):
-                        pVal = results[m[k]][1]
-                        if pVal < 0.05:
-                            table_matrix.append([m[k], results[m[k]][0], results[m[k]][1]])
-                else:
-                    m = results.keys()
-                    for k in range(len(m)):
-                        table_matrix.append([m[k], results[m[k]][0], results[m[k]][1]])
-                table = PT(table_matrix[0])
-                for row in range(1,len(table_matrix)):
-                    table.add_row(table_matrix[row])
-                print table
-            else:
-                print('Error: Measures must be paired two by two')
-    return table_matrix
+        tests = []
+        for i in range(0, len(measures), 2):
+            x, y = _present(np.asarray(data[measures[i]], dtype=np.float64),
+                            np.asarray(data[measures[i + 1]], dtype=np.float64))
+            t, p = pairedTtestBatch(x[:, None], y[:, None])
+            tests.append((measures[i] + '/' + measures[i + 1], t[0], _pairedShard, (x - y,)))
+        return _resamplingTable(['Paired permutation test', 'Test Statistic', 'Permutation p-Value',
+                                 'Mean diff. CI 2.5%', 'Mean diff. CI 97.5%'], tests, printSig, options)
+    return None
 
-def indepTtest(data, printSig, groupBy, *measures):
-    '''This function computes the independent T-test for measures grouped by groupBy from data dictionary.
+
+@_profiled
+def indepPermutationTest(data, printSig, groupBy, *measures, **options):
+    '''This function computes the independent T-test for measures grouped by groupBy with a label permutation
+    p-value and a bootstrap 95% confidence interval of the difference of means (see resamplingEngine).
+    As in indepTtest, Welch's statistic is used when the Levene p-value is under 0.05.
     INPUT: data is the dictionary containing the data names and values (dict).  printSig is a boolean
            variable, True: the function only prints the significative results, False: the function
            prints all the values (bool).  groupBy is a list that contains 3 values, the first is the
            grouping variable, the second and the third are the groups to differentiate (list).  *measures
-           contain all the pairs of variables to compare (strings).
+           contain all the variables to compare (strings).  Options: resamples (int, 10000), seed (int),
+           workers (int) and maxBytes (int) (see resamplingEngine).  quiet=True skips printing the table.
+           correction ('bonferroni', 'holm', 'hochberg', 'fdr_bh', 'fdr_by') adjusts
+           the p-values of the batch and printSig uses the adjusted ones (see correctPValues).
     OUTPUT: The function prints a table in the terminal containing all the tests computed.'''
+    options = _options(options, resamples=10000, seed=None, workers=1, maxBytes=2 ** 26, quiet=False,
+                       correction=None)
     if not isinstance(data, dict):
         print ('Error: data must be a dict. Use dataRead function to import your excel data.')
+    elif not isinstance(printSig, bool):
+        print ('Error: printSig must be a bool. True: the function only prints the siginificative results/ False: '
+               'the function prints all the results.')
+    elif not (isinstance(groupBy, list) and len(groupBy) == 3):
+        print('Error: groupBy must be a list with three elements, the first one is the variable of grouping,'
+              ' the second and the third are the groups to compare.')
     else:
-        if not isinstance(printSig, bool):
-            print ('Error: printSig must be a bool. True: the function only prints the siginificative results/ False: '
-                   'the function prints all the results.')
-        else:
-            if not isinstance(groupBy, list) and len(groupBy) == 3:
-                print('Error: groupBy must be a list with three elements, the first one is the variable of grouping,'
-                      ' the second and the third are the groups to compare.')
-            else:
-                indexG1 = []
-                indexG2 = []
-                results = OrderedDict()
-                for i in range(len(data[groupBy[0]])):
-                    if data[groupBy[0]][i] == groupBy[1]:
-                        indexG1.append(i)
-                    elif data[groupBy[0]][i] == groupBy[2]:
-                        indexG2.append(i)
-                for i in range(len(measures)):
-                    m1 = []
-                    m2 = []
-                    for g1 in range(len(indexG1)):
-                        m1.append(data[measures[i]][g1])
-                    for g2 in range(len(indexG2)):
-                        m2.append(data[measures[i]][g2])
-                    levene = stats.levene(m1, m2)
-                    if levene[1] > 0.05:
-                        testName = measures[i] + ' (' + groupBy[1] + '/' + groupBy[2] + ')'
-                        res = stats.ttest_ind(m1, m2, equal_var = True)
-                        results[testName] = [levene, res]
-                    elif levene[1] < 0.05:
-                        testName = measures[i] + ' (' + groupBy[1] + '/' + groupBy[2] + ')'
-                        res = stats.ttest_ind(m1, m2, equal_var=False)
-                        results[testName] = [levene, res]
-                table_matrix = [['Independent T-test', 'Levene Statistic', 'Levene p-Value','Test Statistic',
-                                 'p-Value']]
-                if printSig:
-                    m = results.keys()
-                    for k in range(len(m)):
-                        pVal = results[m[k]][1][1]
-                        if pVal < 0.05:
-                            table_matrix.append([m[k], results[m[k]][0][0], results[m[k]][0][1], results[m[k]][1][0],
-                                                 results[m[k]][1][1]])
-                else:
-                    m = results.keys()
-                    for k in range(len(m)):
-                        table_matrix.append([m[k], results[m[k]][0][0], results[m[k]][0][1], results[m[k]][1][0],
-                                                 results[m[k]][1][1]])
-                table = PT(table_matrix[0])
-                for row in range(1, len(table_matrix)):
-                    table.add_row(table_matrix[row])
-                print table
-    return table_matrix
-
-# -----CORRELATION TEST FUNCTIONS---------------------------------------------------------------------------------------
+        g1 = _labelMask(data[groupBy[0]], groupBy[1])
+        g2 = _labelMask(data[groupBy[0]], groupBy[2])
+        tests = []
+        for i in range(len(measures)):
+            column = np.asarray(data[measures[i]], dtype=np.float64)
+            x, = _present(column[g1])
+            y, = _present(column[g2])
+            res = indepTtestBatch(x[:, None], y[:, None])
+            tests.append((measures[i] + ' (' + groupBy[1] + '/' + groupBy[2] + ')', res[2, 0], _indepShard,
+                          (x, y, res[1, 0] > 0.05)))
+        return _resamplingTable(['Independent permutation test', 'Test Statistic', 'Permutation p-Value',
+                                 'Mean diff. CI 2.5%', 'Mean diff. CI 97.5%'], tests, printSig, options)
+    return None
 
 
-def pearsonCorrel(data, printSig, *measures):
-    '''This function computes the Pearson correlation over all the possible pairs of the variables included.
+@_profiled
+def pearsonPermutationTest(data, printSig, *measures, **options):
+    '''This function computes the Pearson correlation over all the possible pairs of the variables included
+    with a permutation p-value and a bootstrap 95% confidence interval of the coefficient (see
+    resamplingEngine). Missing values are excluded pair by pair.
     INPUT: data is the dictionary containing the data names and values (dict).  printSig is a boolean
            variable, True: the function only prints the significative results, False: the function
            prints all the values (bool). *measures contain all the variables to compare (strings).
+           Options: resamples (int, 10000), seed (int), workers (int), maxBytes (int) and quiet (bool).
+           correction ('bonferroni', 'holm', 'hochberg', 'fdr_bh', 'fdr_by') adjusts
+           the p-values of the batch and printSig uses the adjusted ones (see correctPValues).
     OUTPUT: The function prints a table in the terminal containing all the tests computed.'''
+    options = _options(options, resamples=10000, seed=None, workers=1, maxBytes=2 ** 26, quiet=False,
+                       correction=None)
     if not isinstance(data, dict):
         print ('Error: data must be a dict. Use dataRead function to import your excel data.')
+    elif not isinstance(printSig, bool):
+        print ('Error: printSig must be a bool. True: the function only prints the siginificative results/ False: '
+               'the function prints all the results.')
+    elif not len(measures) >= 2:
+        print('Error: At least two measures are necessary to compute correlation.')
     else:
-        if not isinstance(printSig, bool):
-            print ('Error: printSig must be a bool. True: the function only prints the siginificative results/ False: '
-                   'the function prints all the results.')
-        else:
-            if not  len(measures) >= 2:
-                print('Error: At least two measures are necessary to compute correlation.')
-            else:
-                pairs = list(itertools.combinations(measures, 2))
-                results = OrderedDict()
-                for i in range(len(pairs)):
-                    testName = pairs[i][0] + '/' + pairs[i][1]
-                    res = stats.pearsonr(data[pairs[i][0]], data[pairs[i][1]])
-                    results[testName] = res
-                table_matrix = [['Pearson correlation', 'Correl. coefficient', 'p-Value']]
-                if printSig:
-                    m = results.keys()
-                    for k in range(len(m)):
-                        pVal = results[m[k]][1]
-                        if pVal < 0.05:
-                            table_matrix.append([m[k], results[m[k]][0], results[m[k]][1]])
-                else:
-                    m = results.keys()
-                    for k in range(len(m)):
-                        table_matrix.append([m[k], results[m[k]][0], results[m[k]][1]])
-                table = PT(table_matrix[0])
-                for row in range(1,len(table_matrix)):
-                    table.add_row(table_matrix[row])
-                print table
-    return table_matrix
+        X = _dataMatrix(data, measures)
+        r, p, n = correlationMatrix(X)
+        tests = []
+        for i, j in itertools.combinations(range(len(measures)), 2):
+            x, y = _present(X[:, i], X[:, j])
+            tests.append((measures[i] + '/' + measures[j], r[i, j], _correlShard, (x, y)))
+        return _resamplingTable(['Pearson permutation test', 'Correl. coefficient', 'Permutation p-Value',
+                                 'CI 2.5%', 'CI 97.5%'], tests, printSig, options)
+    return None
 
 # -----OTHER TEST FUNCTIONS---------------------------------------------------------------------------------------------
 
 
-def normalityTest(data, printSig, *measures):
-    '''This function computes the normality test for the variables included.
+@_profiled
+def normalityTest(data, printSig, *measures, **options):
+    '''This function computes the normality test for the variables included. Variables already tested
+    with the same values are taken from the descriptives cache (see DescriptiveCache).
     INPUT: data is the dictionary containing the data names and values (dict).  printSig is
            a boolean variable, True: the function only prints the significative results, False:
            the function prints all the values (bool).  *measures contain all the variables to
-           compute the test over (strings).
-    OUTPUT: The function prints a table in the terminal containing all the tests computed.'''
+           compute the test over (strings).  quiet=True skips printing the table.
+           correction ('bonferroni', 'holm', 'hochberg', 'fdr_bh', 'fdr_by') adjusts
+           the p-values of the batch and printSig uses the adjusted ones (see correctPValues).
+    OUTPUT: The function prints a table in the terminal containing all the tests computed and returns
+            the results (ResultTable).'''
+    options = _options(options, quiet=False, correction=None)
+    result = None
     if not isinstance(data, dict):
         print ('Error: data must be a dict. Use dataRead function to import your excel data.')
     else:
@@ -217,121 +2062,201 @@ def normalityTest(data, printSig, *measures):
             print ('Error: printSig must be a bool. True: the function only prints the siginificative results/ False: '
                    'the function prints all the results.')
         else:
-            results = OrderedDict()
-            for i in range(len(measures)):
-                testName = measures[i]
-                res = stats.normaltest(data[measures[i]])
-                results[testName] = res
-            table_matrix = [['Normality test', 'Test Statistic', 'p-Value']]
-            if printSig:
-                m = results.keys()
-                for k in range(len(m)):
-                    pVal = results[m[k]][1]
-                    if pVal < 0.05:
-                        table_matrix.append([m[k], results[m[k]][0], results[m[k]][1]])
-            else:
-                m = results.keys()
-                for k in range(len(m)):
-                    table_matrix.append([m[k], results[m[k]][0], results[m[k]][1]])
-            table = PT(table_matrix[0])
-            for row in range(1, len(table_matrix)):
-                table.add_row(table_matrix[row])
-            print table
+            described = _describe(_dataMatrix(data, measures), ('normaltest',),
+                                  _sliceKeys(_columnDigests(data, measures)))
+            statistic, p = described['normalStatistic'], described['normalP']
+            result = _report(_normalityResult(measures, statistic, p, printSig, options['correction']), options)
+    return result
+
+
+def _normalityResult(measures, statistic, p, printSig, correction=None):
+    '''Normality test results, the statistic follows a chi-squared distribution with 2 degrees of freedom.'''
+    adjusted = _adjust(p, correction)
+    return ResultTable(lambda: _normalityTable(measures, statistic, p, printSig, adjusted), measures, statistic, p,
+                       2, pAdjusted=adjusted, correction=correction)
+
+
+def _normalityTable(measures, statistic, p, printSig, adjusted=None):
+    '''Rows of the normality test table, a repeated measure keeps its first place.'''
+    results = OrderedDict()
+    for i in range(len(measures)):
+        results[measures[i]] = _sigRow([statistic[i], p[i]], adjusted, i)
+    table_matrix = [_sigHeader(['Normality test', 'Test Statistic', 'p-Value'], adjusted)]
+    for testName, res in results.items():
+        if not printSig or res[-1] < 0.05:
+            table_matrix.append([testName] + res)
     return table_matrix
 
+# -----PARALLEL EXECUTION---------------------------------------------------------------------------------------------
+
+
+_workerArrays = {}
+
+
+def _options(options, **defaults):
+    '''Checks the keyword options of a function against their defaults and fills the missing ones.'''
+    for name in options:
+        if name not in defaults:
+            raise TypeError('unexpected keyword argument ' + repr(name))
+    defaults.update(options)
+    return defaults
+
+
+def _shareArrays(arrays):
+    '''Copies the arrays into shared memory blocks that the pool processes inherit instead of receiving
+    them pickled with every task.'''
+    shared = {}
+    for name, X in arrays.items():
+        X = np.ascontiguousarray(X)
+        raw = multiprocessing.RawArray('b', max(1, X.nbytes))
+        np.frombuffer(raw, dtype=X.dtype, count=X.size).reshape(X.shape)[...] = X
+        shared[name] = (raw, X.dtype.str, X.shape)
+    return shared
+
+
+def _initWorker(shared):
+    global _workerArrays
+    _workerArrays = {}
+    for name, (raw, dtype, shape) in shared.items():
+        _workerArrays[name] = np.frombuffer(raw, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+
+
+def _runTask(arrays, task):
+    function, start, stop, c0, c1 = task
+    return function(arrays, arrays['order'][start:stop], c0, c1)
+
+
+def _poolTask(task):
+    return _runTask(_workerArrays, task)
+
+
+@_profiled
+def groupMap(function, arrays, index, nColumns, workers=1, columnChunk=None):
+    '''This function runs function(arrays, rows, c0, c1) for every group of index and every chunk of columns
+    c0:c1, where rows are the row numbers of the group. With workers > 1 the tasks run in a process pool
+    and the arrays are placed in shared memory once, so only the task bounds are sent to the workers.
+    Results are collected in the same order as the sequential run.
+    INPUT: function is a module level function returning a statistics x columns array (function).  arrays
+           contain the named arrays used by function (dict).  index is the GroupIndex of the groups
+           (GroupIndex).  nColumns is the number of columns (int).  workers is the number of processes (int).
+           columnChunk is the number of columns of each task, by default the columns are only split
+           between the workers when there are fewer groups than workers (int).
+    OUTPUT: List with the statistics x columns array of each group (list).'''
+    if columnChunk is None:
+        if len(index) >= workers:
+            columnChunk = max(1, nColumns)
+        else:
+            columnChunk = max(1, -(-nColumns * len(index) // max(1, workers)))
+    arrays = dict(arrays, order=index.order)
+    tasks = []
+    for g in range(len(index)):
+        for c0 in range(0, max(1, nColumns), columnChunk):
+            tasks.append((function, index.offsets[g], index.offsets[g + 1], c0, min(c0 + columnChunk, nColumns)))
+    if workers > 1 and len(tasks) > 1:
+        pool = multiprocessing.Pool(workers, _initWorker, (_shareArrays(arrays),))
+        try:
+            results = pool.map(_poolTask, tasks)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = [_runTask(arrays, task) for task in tasks]
+    perGroup = len(results) // max(1, len(index))
+    return [np.concatenate(results[g * perGroup:(g + 1) * perGroup], axis=1) for g in range(len(index))]
+
+
+def _pairedGroupTask(arrays, rows, c0, c1):
+    return np.array(pairedTtestBatch(arrays['left'][rows, c0:c1], arrays['right'][rows, c0:c1]))
+
+
+def _indepGroupTask(arrays, rows, c0, c1):
+    rows1 = rows[arrays['g1'][rows]]
+    rows2 = rows[arrays['g2'][rows]]
+    digests = arrays['digests'][c0:c1]
+    return indepTtestBatch(arrays['X'][rows1, c0:c1], arrays['X'][rows2, c0:c1],
+                           (_sliceKeys(digests, rows1), _sliceKeys(digests, rows2)))
+
 # -----GROUPED T-TEST FUNCTIONS-----------------------------------------------------------------------------------------
 
 
+def _checkGrouping(data, sortBy):
+    if not isinstance(data, dict):
+        print ('Error: data must be a dict. Use dataRead function to import your excel data.')
+        return False
+    if not isinstance(sortBy, basestring):
+        print('Error: sortBy must be a string with the name of the variable by wich you would want to group the'
+              ' data.')
+        return False
+    return True
+
+
+@_profiled
 def analyzeBy(data, sortBy):
     '''This function sorts a data dictionary in different dictionaries, one for each category in the grouping
-     variable.
+     variable. Categories keep their order of appearance, the grouped tests use the GroupIndex directly
+     instead of these per group copies.
      INPUT: data is the dictionary containing the data names and values (dict).  sortBy is the name of the
             grouping variable (string).
      OUTPUT: The output is a dictionary containing several dictionaries, one for each grouping category (dict).'''
-    if not isinstance(data, dict):
-        print ('Error: data must be a dict. Use dataRead function to import your excel data.')
-    else:
-        if not isinstance(sortBy, basestring):
-            print('Error: sortBy must be a string with the name of the variable by wich you would want to group the'
-                  ' data.')
-        else:
-            tempData = data.copy()
-            groupList = tempData[sortBy]
-            del tempData[sortBy]
-            cat = Counter(groupList)
-            categories = cat.keys()
-            sortedData = OrderedDict()
-            for i in range(len(categories)):
-                sortedData[categories[i]] = OrderedDict()
-            for i in range(len(tempData.keys())):
-                for j in range(len(sortedData.keys())):
-                    sortedData[sortedData.keys()[j]][tempData.keys()[i]] = []
-            for i in range(len(groupList)):
-                for j in range(len(tempData.keys())):
-                    sortedData[groupList[i]][tempData.keys()[j]].append(tempData[tempData.keys()[j]][i])
+    if not _checkGrouping(data, sortBy):
+        return None
+    with _span('analyzeBy.index'):
+        index = GroupIndex(data[sortBy])
+    names = [name for name in data.keys() if name != sortBy]
+    sortedData = OrderedDict()
+    with _span('analyzeBy.regroup'):
+        for g in range(len(index)):
+            sortedData[index.categories[g]] = index.group(data, g, names)
     return sortedData
 
 
-def groupedPairedTtest(data, sortBy, printSig, *measures):
+@_profiled
+def groupedPairedTtest(data, sortBy, printSig, *measures, **options):
     '''This function computes the paired T-test for pairs of measures from data dictionary.
         INPUT: data is the dictionary containing the data names and values (dict).  printSig is
                a boolean variable, True: the function only prints the significative results, False:
                the function prints all the values (bool).  *measures contain all the pairs of
-               variables to compare (strings).
-        OUTPUT: The function prints a table in the terminal containing all the tests computed.'''
-    sortedData = analyzeBy(data, sortBy)
+               variables to compare (strings).  workers=n runs the groups in n processes (see groupMap).
+               quiet=True skips printing the table.
+               correction ('bonferroni', 'holm', 'hochberg', 'fdr_bh', 'fdr_by') adjusts
+               the p-values of the batch and printSig uses the adjusted ones (see correctPValues).
+        OUTPUT: The function prints a table in the terminal containing all the tests computed and returns
+                the results with the group of each test (ResultTable).'''
+    options = _options(options, workers=1, quiet=False, correction=None)
+    result = None
+    if not _checkGrouping(data, sortBy):
+        return None
     if not isinstance(printSig, bool):
         print ('Error: printSig must be a bool. True: the function only prints the siginificative results/ False: '
                'the function prints all the results.')
     else:
         if len(measures) % 2 == 0:
-            fullResults = OrderedDict()
-            for i in range(len(sortedData.keys())):
-                groupName = sortedData.keys()[i]
-                tempData = sortedData[sortedData.keys()[i]]
-                results = OrderedDict()
-                for j in range(0, len(measures), 2):
-                    testName = measures[j] + '/' + measures[j + 1]
-                    res = stats.ttest_rel(tempData[measures[j]], tempData[measures[j + 1]])
-                    results[testName] = res
-                fullResults[groupName] = results
-            table_matrix = [['', 'Paired T-test', 'Test Statistic', 'p-Value']]
-            for i in range(len(fullResults.keys())):
-                if printSig:
-                    results = fullResults[fullResults.keys()[i]]
-                    m = results.keys()
-                    for k in range(len(m)):
-                        pVal = results[m[k]][1]
-                        if pVal < 0.05:
-                            if k == 0:
-                                table_matrix.append([fullResults.keys()[i], m[k], results[m[k]][0], results[m[k]][1]])
-                            else:
-                                table_matrix.append(['', m[k], results[m[k]][0], results[m[k]][1]])
-                else:
-                    results = fullResults[fullResults.keys()[i]]
-                    m = results.keys()
-                    for k in range(len(m)):
-                        if k == 0:
-                            table_matrix.append([fullResults.keys()[i], m[k], results[m[k]][0], results[m[k]][1]])
-                        else:
-                            table_matrix.append(['', m[k], results[m[k]][0], results[m[k]][1]])
-            table = PT(table_matrix[0])
-            for row in range(1, len(table_matrix)):
-                table.add_row(table_matrix[row])
-            print table
+            index = GroupIndex(data[sortBy])
+            arrays = {'left': _dataMatrix(data, measures[0::2]), 'right': _dataMatrix(data, measures[1::2])}
+            groupResults = groupMap(_pairedGroupTask, arrays, index, len(measures) // 2, options['workers'])
+            result = _report(_groupedPairedResult(index, measures, groupResults, printSig, options['correction']),
+                             options)
         else:
             print('Error: Measures must be paired two by two')
-    return table_matrix
+    return result
 
 
-def groupedIndepTtest(data, sortBy, printSig, groupBy, *measures):
+@_profiled
+def groupedIndepTtest(data, sortBy, printSig, groupBy, *measures, **options):
     '''This function computes the paired T-test for pairs of measures from data dictionary.
         INPUT: data is the dictionary containing the data names and values (dict).  printSig is
                a boolean variable, True: the function only prints the significative results, False:
                the function prints all the values (bool).  *measures contain all the pairs of
-               variables to compare (strings).
-        OUTPUT: The function prints a table in the terminal containing all the tests computed.'''
-    sortedData = analyzeBy(data, sortBy)
+               variables to compare (strings).  workers=n runs the groups in n processes (see groupMap).
+               quiet=True skips printing the table.
+               correction ('bonferroni', 'holm', 'hochberg', 'fdr_bh', 'fdr_by') adjusts
+               the p-values of the batch and printSig uses the adjusted ones (see correctPValues).
+        OUTPUT: The function prints a table in the terminal containing all the tests computed and returns
+                the results with the group of each test (ResultTable).'''
+    options = _options(options, workers=1, quiet=False, correction=None)
+    result = None
+    if not _checkGrouping(data, sortBy):
+        return None
     if not isinstance(printSig, bool):
         print ('Error: printSig must be a bool. True: the function only prints the siginificative results/ False: '
                'the function prints all the results.')
@@ -340,78 +2265,209 @@ def groupedIndepTtest(data, sortBy, printSig, groupBy, *measures):
             print('Error: groupBy must be a list with three elements, the first one is the variable of grouping,'
                   ' the second and the third are the groups to compare.')
         else:
-            fullResults = OrderedDict()
-            for i in range(len(sortedData.keys())):
-                groupName = sortedData.keys()[i]
-                tempData = sortedData[sortedData.keys()[i]]
-                indexG1 = []
-                indexG2 = []
-                results = OrderedDict()
-                for j in range(len(tempData[groupBy[0]])):
-                    if tempData[groupBy[0]][j] == groupBy[1]:
-                        indexG1.append(j)
-                    elif tempData[groupBy[0]][j] == groupBy[2]:
-                        indexG2.append(j)
-                for j in range(len(measures)):
-                    m1 = []
-                    m2 = []
-                    for g1 in range(len(indexG1)):
-                        m1.append(tempData[measures[j]][g1])
-                    for g2 in range(len(indexG2)):
-                        m2.append(tempData[measures[j]][g2])
-                    levene = stats.levene(m1, m2)
-                    if levene[1] > 0.05:
-                        testName = measures[j] + ' (' + groupBy[1] + '/' + groupBy[2] + ')'
-                        res = stats.ttest_ind(m1, m2, equal_var=True)
-                        results[testName] = [levene, res]
-                    elif levene[1] < 0.05:
-                        testName = measures[j] + ' (' + groupBy[1] + '/' + groupBy[2] + ')'
-                        res = stats.ttest_ind(m1, m2, equal_var=False)
-                        results[testName] = [levene, res]
-                    fullResults[groupName] = results
-            table_matrix = [['', 'Independent T-test', 'Levene Statistic', 'Levene p-Value', 'Test Statistic',
-                            'p-Value']]
-            for i in range(len(fullResults.keys())):
-                if printSig:
-                    results = fullResults[fullResults.keys()[i]]
-                    m = results.keys()
-                    for k in range(len(m)):
-                        pVal = results[m[k]][1][1]
-                        if pVal < 0.05:
-                            if k == 0:
-                                table_matrix.append([fullResults.keys()[i], m[k], results[m[k]][0][0],
-                                                     results[m[k]][0][1], results[m[k]][1][0], results[m[k]][1][1]])
-                            else:
-                                table_matrix.append(['', m[k], results[m[k]][0][0],
-                                                     results[m[k]][0][1], results[m[k]][1][0], results[m[k]][1][1]])
-                else:
-                    results = fullResults[fullResults.keys()[i]]
-                    m = results.keys()
-                    for k in range(len(m)):
-                        if k == 0:
-                            table_matrix.append([fullResults.keys()[i], m[k], results[m[k]][0][0],
-                                                 results[m[k]][0][1], results[m[k]][1][0], results[m[k]][1][1]])
-                        else:
-                            table_matrix.append(['', m[k], results[m[k]][0][0],
-                                                 results[m[k]][0][1], results[m[k]][1][0], results[m[k]][1][1]])
-                table = PT(table_matrix[0])
-                for row in range(1, len(table_matrix)):
-                    table.add_row(table_matrix[row])
-            print table
+            index = GroupIndex(data[sortBy])
+            arrays = {'X': _dataMatrix(data, measures), 'g1': _labelMask(data[groupBy[0]], groupBy[1]),
+                      'g2': _labelMask(data[groupBy[0]], groupBy[2]), 'digests': _columnDigests(data, measures)}
+            groupResults = groupMap(_indepGroupTask, arrays, index, len(measures), options['workers'])
+            result = _report(_groupedIndepResult(index, groupBy, measures, groupResults, arrays, printSig,
+                                                 options['correction']), options)
+    return result
+
+
+def _groupedTable(header, index, groupResults, printSig):
+    '''Rows of a grouped table, groupResults hold for each group of index an OrderedDict of test name and
+    its values with the p-value last. The group name goes in the row of its first test.'''
+    table_matrix = [header]
+    for i in range(len(index)):
+        m = groupResults[i].keys()
+        for k in range(len(m)):
+            row = groupResults[i][m[k]]
+            if not printSig or row[-1] < 0.05:
+                table_matrix.append([index.categories[i] if k == 0 else '', m[k]] + list(row))
     return table_matrix
 
 
+def _groupedResult(index, labels, groupResults, tRow, build, correction, n1, n2=None):
+    '''Results of the T-tests of every group, n1 (and n2 for independent tests) are the subjects of each
+    group. The effect size is Cohen's dz for paired tests and Cohen's d for independent tests. The
+    correction is applied over the tests of all the groups, build receives the adjusted p-values of each
+    group.'''
+    t = np.concatenate([res[tRow] for res in groupResults]) if groupResults else np.empty(0)
+    p = np.concatenate([res[tRow + 1] for res in groupResults]) if groupResults else np.empty(0)
+    adjusted = _adjust(p, correction)
+    byGroup = [None] * len(index) if adjusted is None else np.split(adjusted, len(index))
+    n1 = np.repeat(n1, len(labels)).astype(np.float64)
+    groups = [index.categories[g] for g in range(len(index)) for label in labels]
+    if n2 is None:
+        return ResultTable(lambda: build(byGroup), labels * len(index), t, p, n1 - 1, t / np.sqrt(n1), groups,
+                           adjusted, correction)
+    n2 = np.repeat(n2, len(labels)).astype(np.float64)
+    df = np.concatenate([res[4] for res in groupResults]) if groupResults else np.empty(0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        d = t * np.sqrt(1 / n1 + 1 / n2)
+    return ResultTable(lambda: build(byGroup), labels * len(index), t, p, df, d, groups, adjusted, correction)
+
+
+def _groupedPairedResult(index, measures, groupResults, printSig, correction=None):
+    return _groupedResult(index, _pairedLabels(measures), groupResults, 0,
+                          lambda adjusted: _groupedPairedTable(index, measures, groupResults, printSig, adjusted),
+                          correction, np.diff(index.offsets))
+
+
+def _groupedIndepResult(index, groupBy, measures, groupResults, arrays, printSig, correction=None):
+    n1 = [arrays['g1'][index.rows(g)].sum() for g in range(len(index))]
+    n2 = [arrays['g2'][index.rows(g)].sum() for g in range(len(index))]
+    return _groupedResult(index, _indepLabels(groupBy, measures), groupResults, 2,
+                          lambda adjusted: _groupedIndepTable(index, groupBy, measures, groupResults, printSig,
+                                                              adjusted, n1, n2), correction, n1, n2)
+
+
+def _groupedPairedTable(index, measures, groupResults, printSig, adjusted):
+    results = []
+    for g in range(len(index)):
+        t, p = groupResults[g]
+        pairs = OrderedDict()
+        for j in range(0, len(measures), 2):
+            pairs[measures[j] + '/' + measures[j + 1]] = _sigRow([t[j // 2], p[j // 2]], adjusted[g], j // 2)
+        results.append(pairs)
+    return _groupedTable(_sigHeader(['', 'Paired T-test', 'Test Statistic', 'p-Value'], adjusted[0]), index, results,
+                         printSig)
+
+
+def _groupedIndepTable(index, groupBy, measures, groupResults, printSig, adjusted, n1, n2):
+    '''Rows of the grouped independent T-test table, the groups without subjects of one of the labels (n1 or
+    n2 of 0, their tests are nan) are left out.'''
+    results = [_indepResults(groupBy, measures, groupResults[g], adjusted[g]) if n1[g] and n2[g] else OrderedDict()
+               for g in range(len(index))]
+    return _groupedTable(_sigHeader(['', 'Independent T-test', 'Levene Statistic', 'Levene p-Value',
+                                     'Test Statistic', 'p-Value'], adjusted[0]), index, results, printSig)
+
+
 # -----ANOVA FUNCTIONS--------------------------------------------------------------------------------------------------
 
 
-def repeatedMeasuresAnova(data, subID, conditionName, *measures):
+def _helmert(levels):
+    '''Orthonormal contrasts between the levels of a factor (levels x levels - 1 array).'''
+    H = np.zeros((levels, levels - 1))
+    for j in range(1, levels):
+        H[:j, j - 1] = 1.0
+        H[j, j - 1] = -j
+        H[:, j - 1] = H[:, j - 1] / np.sqrt(j * (j + 1.0))
+    return H
+
+
+@_profiled
+def anovaWithin(Y, factors, levels):
+    '''This function computes the repeated measures ANOVA of a subjects x cells matrix. The columns of Y are
+    the cells of the within factors with the last factor varying fastest. Every effect (main effects
+    and interactions) is projected on its orthonormal contrasts, which gives its sum of squares, the
+    error term and the Greenhouse-Geisser, Huynh-Feldt and lower-bound epsilons from the covariance of
+    the projections.
+    INPUT: Y is a subjects x cells array (array).  factors contain the names of the within factors (list).
+           levels contain the number of levels of each factor (list).
+    OUTPUT: Dictionary of effects (tuple of factor names) with the ss, df, mss, F, p, sse, dfe, mse values
+            and their _gg, _hf and _lb corrections (dict).'''
+    Y = np.asarray(Y, dtype=np.float64)
+    n = Y.shape[0]
+    aov = OrderedDict()
+    for size in range(1, len(factors) + 1):
+        for effect in itertools.combinations(range(len(factors)), size):
+            M = np.ones((1, 1))
+            for f in range(len(factors)):
+                if f in effect:
+                    M = np.kron(M, _helmert(levels[f]))
+                else:
+                    M = np.kron(M, np.ones((levels[f], 1)) / np.sqrt(levels[f]))
+            Z = np.dot(Y, M)
+            mean = Z.mean(axis=0)
+            Zc = Z - mean
+            r = OrderedDict()
+            r['ss'] = n * (mean ** 2).sum()
+            r['sse'] = (Zc ** 2).sum()
+            r['df'] = float(M.shape[1])
+            r['dfe'] = r['df'] * (n - 1)
+            r['mss'] = r['ss'] / r['df']
+            r['mse'] = r['sse'] / r['dfe']
+            r['F'] = r['mss'] / r['mse']
+            r['p'] = stats.f.sf(r['F'], r['df'], r['dfe'])
+            if r['df'] == 1:
+                r['eps_gg'] = r['eps_hf'] = r['eps_lb'] = 1.0
+            else:
+                S = np.dot(Zc.T, Zc) / (n - 1)
+                r['eps_gg'] = np.trace(S) ** 2 / (r['df'] * (S ** 2).sum())
+                hf = (n * r['df'] * r['eps_gg'] - 2) / (r['df'] * (n - 1 - r['df'] * r['eps_gg']))
+                r['eps_hf'] = min(max(hf, r['eps_gg']), 1.0)
+                r['eps_lb'] = 1.0 / r['df']
+            for x in ['_gg', '_hf', '_lb']:
+                r['df' + x] = r['df'] * r['eps' + x]
+                r['dfe' + x] = r['dfe'] * r['eps' + x]
+                r['mss' + x] = r['ss'] / r['df' + x]
+                r['mse' + x] = r['sse'] / r['dfe' + x]
+                r['F' + x] = r['mss' + x] / r['mse' + x]
+                r['p' + x] = stats.f.sf(r['F' + x], r['df' + x], r['dfe' + x])
+            aov[tuple(factors[f] for f in effect)] = r
+    return aov
+
+
+def _anovaRows(name, r):
+    return [[name, 'Sphericity Assumed', r['ss'], r['df'], r['mss'], r['F'], r['p']],
+            ['', 'Greenhouse-Geiser', r['ss'], r['df_gg'], r['mss_gg'], r['F_gg'], r['p_gg']],
+            ['', 'Hyunh-Feldt', r['ss'], r['df_hf'], r['mss_hf'], r['F_hf'], r['p_hf']],
+            ['', 'Box', r['ss'], r['df_lb'], r['mss_lb'], r['F_lb'], r['p_lb']],
+            ['Error(' + name + ')', 'Sphericity Assumed', r['sse'], r['dfe'], r['mse'], '-', '--'],
+            ['', 'Greenhouse-Geiser', r['sse'], r['dfe_gg'], r['mse_gg'], '-', '--'],
+            ['', 'Hyunh-Feldt', r['sse'], r['dfe_hf'], r['mse_hf'], '-', '--'],
+            ['', 'Box', r['sse'], r['dfe_lb'], r['mse_lb'], '-', '--']]
+
+
+def _anovaTable(aov):
+    '''ANOVA table with the rows of every effect computed by anovaWithin.'''
+    table_matrix = [['Source', '', 'Type III SS', 'df', 'SM', 'F', '.Sig']]
+    for effect in aov.keys():
+        table_matrix.extend(_anovaRows(' * '.join(effect), aov[effect]))
+    return table_matrix
+
+
+def _anovaResult(aov):
+    '''ANOVA results of every effect (sphericity assumed), the effect size is the partial eta squared.'''
+    r = aov.values()
+    return ResultTable(lambda: _anovaTable(aov), [' * '.join(effect) for effect in aov.keys()], [e['F'] for e in r],
+                       [e['p'] for e in r], [e['df'] for e in r], [e['ss'] / (e['ss'] + e['sse']) for e in r])
+
+
+def _anovaCells(factorNames, measures):
+    '''Variables of measures in the order of the cells of the design and the number of levels of each factor,
+    or None when the measures do not have exactly one variable for each combination of levels.'''
+    levels = [Categorical.fromValues([m[f + 1] for m in measures]) for f in range(len(factorNames))]
+    nLevels = [len(l.categories) for l in levels]
+    cells = np.ravel_multi_index([l.codes for l in levels], nLevels) if measures else []
+    if len(set(cells)) != len(measures) or len(measures) != np.prod(nLevels):
+        return None
+    variables = [None] * len(measures)
+    for elem in range(len(measures)):
+        variables[cells[elem]] = measures[elem][0]
+    return variables, nLevels
+
+
+def _withinMatrix(data, variables):
+    '''Subjects x cells matrix of the variables, subjects with missing values are removed.'''
+    Y = _dataMatrix(data, variables)
+    return Y[~np.isnan(Y).any(axis=1)]
+
+
+@_profiled
+def repeatedMeasuresAnova(data, subID, conditionName, *measures, **options):
     '''This function computes a ANOVA for repeated measures over the variables defined along
-    with the condition factor.
+    with the condition factor. Each row of data is a subject and each variable a level of the
+    condition, subjects with missing values are excluded (see anovaWithin).
     INPUT: data is the dictionary containing the data names and values (dict). subID is the name
            of the variable that codes the identifier of the subjects(string). conditionName is the
            name of the condition over you want to compute the ANOVA (string). *measures contain
-           pairs of variable / condition over you want to compute the ANOVA.
-    OUTPUT: The function prints a table in the terminal containing all the tests computed.'''
+           pairs of variable / condition over you want to compute the ANOVA.  quiet=True skips printing the table.
+    OUTPUT: The function prints a table in the terminal containing all the tests computed and returns
+            the results, with the partial eta squared as effect size (ResultTable).'''
+    options = _options(options, quiet=False)
+    result = None
     if not isinstance(data, dict):
         print ('Error: data must be a dict. Use dataRead function to import your excel data.')
     else:
@@ -429,56 +2485,66 @@ def repeatedMeasuresAnova(data, subID, conditionName, *measures):
                 if errorCount != 0:
                     print('Error: measures must contain tuples with a data variable and an associated condition.')
                 else:
-                    Sub = namedtuple('Sub', ['Sub_id', 'measure', 'condition'])
-                    df = pt.DataFrame()
-                    for i in range(len(measures)):
-                        meas = data[measures[i][0]]
-                        for j in range(len(meas)):
-                            df.insert(Sub(data[subID][j], meas[j], measures[i][1])._asdict())
-                    aov = df.anova('measure', sub='Sub_id', wfactors=['condition'])
-                    table_matrix = [['Source', '', 'Type III SS', 'df', 'SM', 'F', '.Sig'],
-
-                                    [conditionName, 'Sphericity Assumed', aov[('condition',)]['ss'], aov[('condition',)]['df'],
-                                     aov[('condition',)]['mss'], aov[('condition',)]['F'], aov[('condition',)]['p']],
-
-                                    ['', 'Greenhouse-Geiser', aov[('condition',)]['ss'], aov[('condition',)]['df_gg'],
-                                     aov[('condition',)]['mss_gg'], aov[('condition',)]['F_gg'], aov[('condition',)]['p_gg']],
-
-                                    ['', 'Hyunh-Feldt', aov[('condition',)]['ss'], aov[('condition',)]['df_hf'],
-                                     aov[('condition',)]['mss_hf'], aov[('condition',)]['F_hf'], aov[('condition',)]['p_hf']],
-
-                                    ['', 'Box', aov[('condition',)]['ss'], aov[('condition',)]['df_lb'], aov[('condition',)]['mss_lb'],
-                                     aov[('condition',)]['F_lb'], aov[('condition',)]['p_lb']],
-
-                                    ['Error(' + conditionName + ')', 'Sphericity Assumed', aov[('condition',)]['sse'], aov[('condition',)]['dfe'],
-                                     aov[('condition',)]['mse'], '-', '--'],
-
-                                    ['', 'Greenhouse-Geiser', aov[('condition',)]['sse'], aov[('condition',)]['dfe_gg'],
-                                     aov[('condition',)]['mse_gg'], '-', '--'],
-
-                                    ['', 'Hyunh-Feldt', aov[('condition',)]['sse'], aov[('condition',)]['dfe_hf'],
-                                     aov[('condition',)]['mse_hf'], '-', '--'],
-
-                                    ['', 'Box', aov[('condition',)]['sse'], aov[('condition',)]['dfe_lb'],
-                                     aov[('condition',)]['mse_lb'], '-', '--']]
-                    table = PT(table_matrix[0])
-                    for row in range(1, len(table_matrix)):
-                        table.add_row(table_matrix[row])
-                    print table
-    return table_matrix
+                    Y = _withinMatrix(data, [m[0] for m in measures])
+                    aov = anovaWithin(Y, [conditionName], [len(measures)])
+                    result = _report(_anovaResult(aov), options)
+    return result
+
+
+@_profiled
+def factorialRepeatedMeasuresAnova(data, subID, factorNames, *measures, **options):
+    '''This function computes a ANOVA for repeated measures with several within factors. Each row of
+    data is a subject and each variable one cell of the design, every combination of levels must have
+    exactly one variable.
+    INPUT: data is the dictionary containing the data names and values (dict). subID is the name
+           of the variable that codes the identifier of the subjects(string). factorNames contain the
+           names of the within factors (list). *measures contain tuples of variable and its level of
+           each factor, e.g. ('RT_A_0', 'A', 0).  quiet=True skips printing the table.
+    OUTPUT: The function prints a table in the terminal containing all the effects computed and returns
+            the results, with the partial eta squared as effect size (ResultTable).'''
+    options = _options(options, quiet=False)
+    result = None
+    if not isinstance(data, dict):
+        print ('Error: data must be a dict. Use dataRead function to import your excel data.')
+    else:
+        if not isinstance(subID, basestring):
+            print ('Error: subID must be a string containing the name of the variable with the subjects ID.')
+        else:
+            if not isinstance(factorNames, list):
+                print ('Error: factorNames must be a list containing the names of the within factors.')
+            else:
+                errorCount = 0
+                for elem in range(len(measures)):
+                    if not (isinstance(measures[elem], tuple) and len(measures[elem]) == len(factorNames) + 1):
+                        errorCount = errorCount + 1
+                if errorCount != 0:
+                    print('Error: measures must contain tuples with a data variable and its level of each factor.')
+                elif _anovaCells(factorNames, measures) is None:
+                    print('Error: measures must contain one variable for each combination of levels.')
+                else:
+                    variables, nLevels = _anovaCells(factorNames, measures)
+                    aov = anovaWithin(_withinMatrix(data, variables), factorNames, nLevels)
+                    result = _report(_anovaResult(aov), options)
+    return result
 
 
 # -----POST HOC-TESTs---------------------------------------------------------------------------------------------------
 
 
-def repMeasBonferroniCorrect(data, printSig, *measures):
+@_profiled
+def repMeasBonferroniCorrect(data, printSig, *measures, **options):
     '''This function computes the Bonferroni correction for pairwise  combination of measures
     from data dictionary.
     INPUT: data is the dictionary containing the data names and values (dict).  printSig is
            a boolean variable, True: the function only prints the significative results, False:
            the function prints all the values (bool).  *measures contain all the variables to
-           compute the pairwise tests (strings).
-    OUTPUT: The function prints a table in the terminal containing all the tests computed.'''
+           compute the pairwise tests (strings).  quiet=True skips printing the table.
+           correction ('bonferroni', 'holm', 'hochberg', 'fdr_bh', 'fdr_by') adjusts
+           the p-values of the batch and printSig uses the adjusted ones (see correctPValues).
+    OUTPUT: The function prints a table in the terminal containing all the tests computed and returns
+            the results, with Cohen's dz as effect size (ResultTable).'''
+    options = _options(options, quiet=False, correction=None)
+    result = None
     if not isinstance(data, dict):
         print ('Error: data must be a dict. Use dataRead function to import your excel data.')
     else:
@@ -486,41 +2552,940 @@ def repMeasBonferroniCorrect(data, printSig, *measures):
             print ('Error: printSig must be a bool. True: the function only prints the siginificative results/ False: '
                    'the function prints all the results.')
         else:
-            n = len(measures)
-            results = OrderedDict()
-            for i in range(0, len(measures)):
-                results[measures[i]] = []
-                for j in range(0, len(measures)):
-                    if j != i:
-                        res = stats.ttest_rel(data[measures[i]], data[measures[j]])
-                        results[measures[i]].append([measures[j], res])
-            table_matrix = [['Bonferroni correction', 'Pairwise T-test', 'Test Statistic', 'p-Value']]
-            if printSig:
-                m = results.keys()
-                for k in range(len(m)):
-                    count = 0
-                    for t in range(len(results[m[k]])):
-                        pVal = results[m[k]][t][1][1]
-                        if pVal < (0.05 / n):
-                            count = count + 1
-                            if count == 1:
-                                table_matrix.append([m[k], results[m[k]][t][0], results[m[k]][t][1][0], results[m[k]][t][1][1]])
-                            else:
-                                table_matrix.append(['', results[m[k]][t][0], results[m[k]][t][1][0], results[m[k]][t][1][1]])
-                table_matrix.append(['Sig if p-Value < ' + str(0.05 / n), '-', '--', '---'])
-            else:
-                m = results.keys()
-                for k in range(len(m)):
-                    for t in range(len(results[m[k]])):
-                        if t == 0:
-                            table_matrix.append(
-                                [m[k], results[m[k]][t][0], results[m[k]][t][1][0], results[m[k]][t][1][1]])
-                        else:
-                            table_matrix.append(
-                                ['', results[m[k]][t][0], results[m[k]][t][1][0], results[m[k]][t][1][1]])
-                table_matrix.append(['Sig if p-Value < ' + str(0.05 / n), '-', '--', '---'])
-            table = PT(table_matrix[0])
-            for row in range(1, len(table_matrix)):
-                table.add_row(table_matrix[row])
-            print table
+            X = _dataMatrix(data, measures)
+            t, p = pairwiseTtest(X)
+            result = _report(_bonferroniResult(measures, t, p, X.shape[0], printSig, options['correction']),
+                             options)
+    return result
+
+
+def _bonferroniResult(measures, t, p, n, printSig, correction=None):
+    '''Pairwise T-test results of n subjects for every ordered pair of different measures. The correction is
+    applied over the distinct pairs, each one is listed in both orders.'''
+    i, j = np.nonzero(~np.eye(len(measures), dtype=bool))
+    labels = [measures[a] + '/' + measures[b] for a, b in zip(i, j)]
+    adjusted = None
+    if correction is not None:
+        adjusted = np.full(p.shape, np.nan)
+        rows, cols = np.triu_indices(len(measures), 1)
+        adjusted[rows, cols] = adjusted[cols, rows] = correctPValues(p[rows, cols], correction)
+    return ResultTable(lambda: _bonferroniTable(measures, t, p, printSig, adjusted), labels, t[i, j], p[i, j], n - 1,
+                       t[i, j] / np.sqrt(n), pAdjusted=None if adjusted is None else adjusted[i, j],
+                       correction=correction)
+
+
+def _bonferroniTable(measures, t, p, printSig, adjusted=None):
+    '''Rows of the Bonferroni table from the pairwise T-test matrices of the measures. With printSig the
+    first significative comparison of each measure carries its name. Without adjusted p-values (matrix)
+    the significance level is 0.05 divided by the number of measures.'''
+    n = len(measures)
+    alpha = 0.05 / n if adjusted is None else 0.05
+    table_matrix = [_sigHeader(['Bonferroni correction', 'Pairwise T-test', 'Test Statistic', 'p-Value'], adjusted)]
+    for i in range(n):
+        count = 0
+        for j in range(n):
+            row = [measures[j], t[i, j], p[i, j]] + ([] if adjusted is None else [adjusted[i, j]])
+            if j != i and (not printSig or row[-1] < alpha):
+                count = count + 1
+                table_matrix.append([measures[i] if count == 1 else ''] + row)
+    if adjusted is None:
+        table_matrix.append(['Sig if p-Value < ' + str(alpha), '-', '--', '---'])
+    else:
+        table_matrix.append(['Sig if Adj. p-Value < ' + str(alpha), '-', '--', '---', '----'])
     return table_matrix
+
+
+# -----OUT-OF-CORE FUNCTIONS--------------------------------------------------------------------------------------------
+
+
+class ColumnStore(object):
+    '''Data set stored on disk by columns for the out-of-core tests (storeCorrelation, storePairedTtest and
+    storeIndepTtest). The rows are kept in chunk files, each one a variables x rows float64 .npy array (so
+    every variable of a chunk is contiguous) opened memory-mapped, text variables are stored as the codes
+    of their categories. manifest.json holds the names, the categories and the number of missing values of
+    the variables and the list of chunks. The tests only load the variables of one tile at once, so the
+    memory they use does not depend on the number of variables.'''
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, 'manifest.json')) as f:
+            manifest = json.load(f)
+        self.names = [_fromJson(name) for name in manifest['names']]
+        self.categories = [None if c is None else [_fromJson(value) for value in c] for c in manifest['categories']]
+        self.missing = np.array(manifest['missing'], dtype=np.int64)
+        self.chunks = manifest['chunks']
+        self.nrows = manifest['nrows']
+        self.positions = dict((name, j) for j, name in enumerate(self.names))
+        self._arrays = [np.load(os.path.join(directory, chunk), mmap_mode='r') for chunk in self.chunks]
+
+    @classmethod
+    def create(cls, directory, chunks):
+        '''Builds a store in directory (replacing the store there) from the DataSets of chunks, e.g.
+        dataStream(file) or [dataRead(file)], and returns it.'''
+        if os.path.isdir(directory):
+            shutil.rmtree(directory)
+        os.makedirs(directory)
+        with open(os.path.join(directory, 'manifest.json'), 'w') as f:
+            json.dump({'names': [], 'categories': [], 'missing': [], 'chunks': [], 'nrows': 0}, f)
+        store = cls(directory)
+        for chunk in chunks:
+            store.append(chunk)
+        return store
+
+    def append(self, data):
+        '''Adds the rows of data (a DataSet with the variables of the store) as a new chunk.'''
+        names = list(data.keys())
+        if not self.chunks:
+            self.names = names
+            self.positions = dict((name, j) for j, name in enumerate(names))
+            self.categories = [[] if isinstance(data[name], Categorical) else None for name in names]
+            self.missing = np.zeros(len(names), dtype=np.int64)
+        elif names != self.names:
+            raise ValueError('the chunk must have the variables of the store')
+        values = np.empty((len(names), len(data[names[0]]) if names else 0))
+        for j in range(len(names)):
+            column = data[names[j]]
+            if self.categories[j] is None:
+                if isinstance(column, Categorical):
+                    raise ValueError(str(names[j]) + ' is a numeric variable of the store')
+                values[j] = column
+                self.missing[j] = self.missing[j] + np.isnan(values[j]).sum()
+            else:
+                if not isinstance(column, Categorical):
+                    column = Categorical.fromValues(list(column))
+                lookup = dict((value, code) for code, value in enumerate(self.categories[j]))
+                for value in column.categories:
+                    if value not in lookup:
+                        lookup[value] = len(self.categories[j])
+                        self.categories[j].append(value)
+                recode = np.array([lookup[value] for value in column.categories], dtype=np.float64)
+                values[j] = recode[column.codes] if len(recode) else []
+        chunk = 'chunk%05d.npy' % len(self.chunks)
+        np.save(os.path.join(self.directory, chunk), values)
+        self.chunks.append(chunk)
+        self.nrows = self.nrows + values.shape[1]
+        self._arrays.append(np.load(os.path.join(self.directory, chunk), mmap_mode='r'))
+        manifest = {'names': self.names, 'categories': self.categories, 'missing': self.missing.tolist(),
+                    'chunks': self.chunks, 'nrows': self.nrows}
+        with open(os.path.join(self.directory, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f)
+        return self
+
+    def numeric(self):
+        '''Names of the numeric variables (list).'''
+        return [self.names[j] for j in range(len(self.names)) if self.categories[j] is None]
+
+    def block(self, names):
+        '''Values of the variables in names as a rows x variables float64 array, text variables as codes.'''
+        positions = [self.positions[name] for name in names]
+        out = np.empty((self.nrows, len(names)))
+        start = 0
+        with _span('store.read'):
+            for array in self._arrays:
+                out[start:start + array.shape[1]] = array[positions].T
+                start = start + array.shape[1]
+        return out
+
+    def column(self, name):
+        '''Variable name as a float64 array or a Categorical.'''
+        values = self.block([name])[:, 0]
+        categories = self.categories[self.positions[name]]
+        if categories is None:
+            return values
+        return Categorical(values.astype(np.int32), categories)
+
+
+class _StreamedTable(object):
+    '''Rows of an out-of-core test, written to the csv file output as they are computed or kept in memory,
+    only the rows with p-value < 0.05 when printSig.'''
+
+    def __init__(self, header, printSig, output):
+        self.header = header
+        self.printSig = printSig
+        self.output = output
+        self.rows = []
+        self.values = []
+        self.file = None
+        if output is not None:
+            self.file = open(output, 'wb')
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(header)
+
+    def add(self, label, columns, statistic, df, effectSize):
+        '''Adds the tests of a tile: label(i) is the name of test i, columns the values of the table (the
+        p-value last) and statistic, df and effectSize the arrays of the ResultTable.'''
+        p = columns[-1]
+        keep = np.flatnonzero(p < 0.05) if self.printSig else np.arange(len(p))
+        for i in keep:
+            row = [label(i)] + [float(column[i]) for column in columns]
+            if self.file is not None:
+                self.writer.writerow([_text(value) for value in row])
+            else:
+                self.rows.append(row)
+                self.values.append((statistic[i], p[i], df[i], effectSize[i]))
+        _count('streamed tests', len(p))
+
+    def close(self, options):
+        if self.file is not None:
+            self.file.close()
+            return self.output
+        table_matrix = [self.header] + self.rows
+        values = np.array(self.values, dtype=np.float64).reshape(len(self.values), 4)
+        return _report(ResultTable(lambda: table_matrix, [row[0] for row in self.rows], values[:, 0], values[:, 1],
+                                   values[:, 2], values[:, 3]), options)
+
+
+def _tiles(k, tileSize):
+    return [(c0, min(c0 + tileSize, k)) for c0 in range(0, k, tileSize)]
+
+
+def _checkStore(store, printSig, names):
+    if not isinstance(store, ColumnStore):
+        print ('Error: store must be a ColumnStore. Use ColumnStore.create to store your data by columns.')
+        return False
+    if not isinstance(printSig, bool):
+        print ('Error: printSig must be a bool. True: the function only prints the siginificative results/ False: '
+               'the function prints all the results.')
+        return False
+    for name in names:
+        if name not in store.positions:
+            print('Error: ' + str(name) + ' is not a variable of the store.')
+            return False
+    return True
+
+
+@_profiled
+def storeCorrelation(store, printSig, *measures, **options):
+    '''This function computes the correlation of every pair of measures of a ColumnStore tile by tile: the
+    variables are read tileSize at a time and each pair of tiles gives a block of coefficients (see
+    correlationBlocks), so the memory used is bounded by the tile size whatever the number of variables.
+    The tests are written to the csv file output as they are computed, or kept in memory, and with printSig
+    only the significative pairs are kept, so the full matrix is never built. The pairs are listed tile by
+    tile. Multiple comparison corrections need every p-value at once, apply correctPValues to the output.
+    INPUT: store is the data stored by columns (ColumnStore).  printSig is a boolean variable, True: only the
+           significative pairs are kept, False: all the pairs are kept (bool).  *measures contain the variables
+           to correlate, all the numeric variables of the store by default (strings).  method is 'pearson',
+           'spearman' or 'kendall' (string).  tileSize is the number of variables read at once (int).
+           output is the route of a csv file for the tests (string).  quiet=True skips printing the table.
+    OUTPUT: The function prints a table in the terminal containing the tests kept and returns the results,
+            the coefficient is also the effect size (ResultTable), or the route of output.'''
+    options = _options(options, method='pearson', tileSize=1024, output=None, quiet=False)
+    names = list(measures) or (store.numeric() if isinstance(store, ColumnStore) else [])
+    if not _checkStore(store, printSig, names):
+        return None
+    if options['method'] not in _CORREL_TITLES:
+        print('Error: method must be pearson, spearman or kendall.')
+        return None
+    if not len(names) >= 2:
+        print('Error: At least two measures are necessary to compute correlation.')
+        return None
+    method = options['method']
+    masked = store.missing[[store.positions[name] for name in names]].any()
+    table = _StreamedTable([_CORREL_TITLES[method], 'Correl. coefficient', 'p-Value'], printSig, options['output'])
+    tiles = _tiles(len(names), options['tileSize'])
+    for a in range(len(tiles)):
+        a0, a1 = tiles[a]
+        A = _correlColumns(store.block(names[a0:a1]), method, masked)
+        for b0, b1 in tiles[a:]:
+            B = A if b0 == a0 else _correlColumns(store.block(names[b0:b1]), method, masked)
+            r, p, n = _correlBlock(A, B, method, a0 == b0)
+            if a0 == b0:
+                i, j = np.triu_indices(a1 - a0, 1)
+            else:
+                i, j = [index.ravel() for index in np.indices(r.shape)]
+            table.add(lambda k: names[a0 + i[k]] + '/' + names[b0 + j[k]], [r[i, j], p[i, j]], r[i, j],
+                      n[i, j] - 2, r[i, j])
+            _count('tiles')
+    return table.close(options)
+
+
+@_profiled
+def storePairedTtest(store, printSig, *measures, **options):
+    '''This function computes the paired T-test for pairs of measures of a ColumnStore, reading tileSize pairs
+    at a time (see storeCorrelation for the output).
+    INPUT: store is the data stored by columns (ColumnStore).  printSig is a boolean variable, True: only the
+           significative tests are kept, False: all the tests are kept (bool).  *measures contain all the
+           pairs of variables to compare (strings).  tileSize is the number of pairs read at once (int).
+           output is the route of a csv file for the tests (string).  quiet=True skips printing the table.
+    OUTPUT: The function prints a table in the terminal containing the tests kept and returns the results,
+            with Cohen's dz as effect size (ResultTable), or the route of output.'''
+    options = _options(options, tileSize=1024, output=None, quiet=False)
+    if not _checkStore(store, printSig, measures):
+        return None
+    if len(measures) % 2 != 0:
+        print('Error: Measures must be paired two by two')
+        return None
+    labels = _pairedLabels(measures)
+    table = _StreamedTable(['Paired T-test', 'Test Statistic', 'p-Value'], printSig, options['output'])
+    n = store.nrows
+    for t0, t1 in _tiles(len(labels), options['tileSize']):
+        t, p = pairedTtestBatch(store.block(measures[2 * t0:2 * t1:2]), store.block(measures[2 * t0 + 1:2 * t1:2]))
+        table.add(lambda k: labels[t0 + k], [t, p], t, np.full(len(t), n - 1.0), t / np.sqrt(n))
+        _count('tiles')
+    return table.close(options)
+
+
+@_profiled
+def storeIndepTtest(store, printSig, groupBy, *measures, **options):
+    '''This function computes the independent T-test for measures of a ColumnStore grouped by groupBy,
+    reading tileSize measures at a time (see indepTtestBatch and storeCorrelation for the output).
+    INPUT: store is the data stored by columns (ColumnStore).  printSig is a boolean variable, True: only the
+           significative tests are kept, False: all the tests are kept (bool).  groupBy is a list that
+           contains 3 values, the first is the grouping variable, the second and the third are the groups to
+           differentiate (list).  *measures contain all the variables to compare, all the numeric variables
+           of the store by default (strings).  tileSize is the number of measures read at once (int).
+           output is the route of a csv file for the tests (string).  quiet=True skips printing the table.
+    OUTPUT: The function prints a table in the terminal containing the tests kept and returns the results,
+            with Cohen's d as effect size (ResultTable), or the route of output.'''
+    options = _options(options, tileSize=1024, output=None, quiet=False)
+    if not isinstance(groupBy, list) or len(groupBy) != 3:
+        print('Error: groupBy must be a list with three elements, the first one is the variable of grouping,'
+              ' the second and the third are the groups to compare.')
+        return None
+    names = list(measures) or ([name for name in store.numeric() if name != groupBy[0]]
+                               if isinstance(store, ColumnStore) else [])
+    if not _checkStore(store, printSig, names + [groupBy[0]]):
+        return None
+    column = store.column(groupBy[0])
+    g1 = _labelMask(column, groupBy[1])
+    g2 = _labelMask(column, groupBy[2])
+    scale = np.sqrt(1.0 / g1.sum() + 1.0 / g2.sum())
+    labels = _indepLabels(groupBy, names)
+    table = _StreamedTable(['Independent T-test', 'Levene Statistic', 'Levene p-Value', 'Test Statistic',
+                            'p-Value'], printSig, options['output'])
+    for t0, t1 in _tiles(len(names), options['tileSize']):
+        X = store.block(names[t0:t1])
+        res = indepTtestBatch(X[g1], X[g2])
+        table.add(lambda k: labels[t0 + k], [res[0], res[1], res[2], res[3]], res[2], res[4], res[2] * scale)
+        _count('tiles')
+    return table.close(options)
+
+# -----ANALYSIS PLANS---------------------------------------------------------------------------------------------------
+
+
+_PLAN_TESTS = OrderedDict([('normality', ()), ('paired', ()), ('indep', ('groupBy',)), ('correlation', ('method',)),
+                           ('anova', ('subID', 'conditionName')), ('factorialAnova', ('subID', 'factorNames')),
+                           ('bonferroni', ()), ('groupedPaired', ('sortBy',)), ('groupedIndep', ('sortBy', 'groupBy'))])
+_CORREL_TITLES = {'pearson': 'Pearson correlation', 'spearman': 'Spearman correlation',
+                  'kendall': 'Kendall correlation'}
+
+
+class AnalysisPlan(object):
+    '''Battery of tests to run over the same data with runPlan. Each method adds one test with the arguments
+    of its function (without data and printSig) and returns the plan, so the steps can be chained:
+        plan = AnalysisPlan().normality('M1', 'M2').paired('M1', 'M2').correlation('pearson', 'M1', 'M2')
+    Every test takes the options name, the key of its table (by default the test and its position), printSig
+    (by default the one of the plan) and correction (see correctPValues). The same plan can be written as a
+    JSON or YAML file:
+        {"printSig": false, "steps": [{"test": "paired", "measures": ["M1", "M2"]},
+                                      {"test": "indep", "groupBy": ["Group", "A", "B"], "measures": ["M1"]}]}'''
+
+    def __init__(self, printSig=False):
+        if not isinstance(printSig, bool):
+            raise TypeError('printSig must be a bool')
+        self.printSig = printSig
+        self.steps = []
+
+    def _add(self, test, measures, options, **arguments):
+        options = _options(options, name=None, printSig=self.printSig, correction=None)
+        if not isinstance(options['printSig'], bool):
+            raise TypeError('printSig must be a bool')
+        if options['correction'] is not None and options['correction'] not in CORRECTIONS:
+            raise ValueError('correction must be one of ' + ', '.join(CORRECTIONS))
+        if options['name'] is None:
+            options['name'] = test + ' ' + str(len(self.steps) + 1)
+        if options['name'] in [step['name'] for step in self.steps]:
+            raise ValueError('the plan already has a step named ' + repr(options['name']))
+        if not measures:
+            raise ValueError(test + ' needs at least one measure')
+        arguments.update(options)
+        arguments.update(test=test, measures=list(measures))
+        self.steps.append(arguments)
+        return self
+
+    def normality(self, *measures, **options):
+        return self._add('normality', measures, options)
+
+    def paired(self, *measures, **options):
+        if len(measures) % 2 != 0:
+            raise ValueError('measures must be paired two by two')
+        return self._add('paired', measures, options)
+
+    def indep(self, groupBy, *measures, **options):
+        return self._add('indep', measures, options, groupBy=_planGroupBy(groupBy))
+
+    def correlation(self, method, *measures, **options):
+        if method not in _CORREL_TITLES:
+            raise ValueError('method must be pearson, spearman or kendall')
+        if len(measures) < 2:
+            raise ValueError('at least two measures are necessary to compute correlation')
+        return self._add('correlation', measures, options, method=method)
+
+    def anova(self, subID, conditionName, *measures, **options):
+        for measure in measures:
+            if not isinstance(measure, tuple):
+                raise ValueError('measures must contain tuples with a data variable and an associated condition')
+        return self._add('anova', measures, options, subID=subID, conditionName=conditionName)
+
+    def factorialAnova(self, subID, factorNames, *measures, **options):
+        for measure in measures:
+            if not (isinstance(measure, tuple) and len(measure) == len(factorNames) + 1):
+                raise ValueError('measures must contain tuples with a data variable and its level of each factor')
+        if _anovaCells(factorNames, measures) is None:
+            raise ValueError('measures must contain one variable for each combination of levels')
+        return self._add('factorialAnova', measures, options, subID=subID, factorNames=list(factorNames))
+
+    def bonferroni(self, *measures, **options):
+        return self._add('bonferroni', measures, options)
+
+    def groupedPaired(self, sortBy, *measures, **options):
+        if len(measures) % 2 != 0:
+            raise ValueError('measures must be paired two by two')
+        return self._add('groupedPaired', measures, options, sortBy=sortBy)
+
+    def groupedIndep(self, sortBy, groupBy, *measures, **options):
+        return self._add('groupedIndep', measures, options, sortBy=sortBy, groupBy=_planGroupBy(groupBy))
+
+    def spec(self):
+        '''Dictionary of the plan in the format of the plan files.'''
+        return {'printSig': self.printSig, 'steps': [dict(step) for step in self.steps]}
+
+    def save(self, path):
+        '''Writes the plan to a JSON file.'''
+        with open(path, 'w') as f:
+            json.dump(self.spec(), f, indent=2)
+
+    @classmethod
+    def fromSpec(cls, spec):
+        '''Builds a plan from its dictionary, the steps are added in their order.'''
+        spec = _planValue(spec)
+        plan = cls(spec.get('printSig', False))
+        for step in spec.get('steps', []):
+            step = dict(step)
+            test = step.pop('test', None)
+            if test not in _PLAN_TESTS:
+                raise ValueError('unknown test ' + repr(test) + ', use one of ' + ', '.join(_PLAN_TESTS))
+            arguments = [step.pop(name) for name in _PLAN_TESTS[test]]
+            measures = step.pop('measures', [])
+            if test in ('anova', 'factorialAnova'):
+                measures = [tuple(measure) for measure in measures]
+            getattr(plan, test)(*(arguments + measures), **step)
+        return plan
+
+    @classmethod
+    def load(cls, path):
+        '''Reads a plan from a JSON file, or from a YAML file (.yaml or .yml) when PyYAML is installed.'''
+        with open(path) as f:
+            if os.path.splitext(path)[1].lower() in ('.yaml', '.yml'):
+                import yaml
+                return cls.fromSpec(yaml.safe_load(f))
+            return cls.fromSpec(json.load(f))
+
+
+def _planGroupBy(groupBy):
+    if not (isinstance(groupBy, (list, tuple)) and len(groupBy) == 3):
+        raise ValueError('groupBy must be a list with three elements, the first one is the variable of grouping,'
+                         ' the second and the third are the groups to compare')
+    return list(groupBy)
+
+
+def _planValue(value):
+    '''Folds the strings of a plan file as dataRead folds the variable names.'''
+    if isinstance(value, dict):
+        return dict((_planValue(k), _planValue(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return [_planValue(v) for v in value]
+    return _ascii(value)
+
+
+def _planVariables(step):
+    if step['test'] in ('anova', 'factorialAnova'):
+        return [step['subID']] + [m[0] for m in step['measures']]
+    variables = list(step['measures'])
+    if 'groupBy' in step:
+        variables.append(step['groupBy'][0])
+    if 'sortBy' in step:
+        variables.append(step['sortBy'])
+    return variables
+
+
+def _union(lists):
+    out = []
+    for names in lists:
+        for name in names:
+            if name not in out:
+                out.append(name)
+    return out
+
+
+class _PlanData(object):
+    '''Intermediates shared by the steps of a plan: the float matrix of every measure, the label masks and
+    the group indices. They are built once before the tests run and only read afterwards.'''
+
+    def __init__(self, data, steps):
+        measures = []
+        for step in steps:
+            if step['test'] in ('anova', 'factorialAnova'):
+                measures.append([m[0] for m in step['measures']])
+            else:
+                measures.append(step['measures'])
+        self.columns = dict((name, j) for j, name in enumerate(_union(measures)))
+        self.X = _dataMatrix(data, _union(measures))
+        self.columnDigests = _columnDigests(data, _union(measures))
+        self.masks = {}
+        self.indexes = {}
+        for step in steps:
+            if 'groupBy' in step:
+                for label in step['groupBy'][1:]:
+                    if (step['groupBy'][0], label) not in self.masks:
+                        self.masks[step['groupBy'][0], label] = _labelMask(data[step['groupBy'][0]], label)
+            if 'sortBy' in step and step['sortBy'] not in self.indexes:
+                self.indexes[step['sortBy']] = GroupIndex(data[step['sortBy']])
+
+    def matrix(self, names):
+        return self.X[:, [self.columns[name] for name in names]]
+
+    def digests(self, names):
+        return self.columnDigests[[self.columns[name] for name in names]]
+
+
+def _planKey(step):
+    test = step['test']
+    if test in ('normality', 'paired', 'bonferroni'):
+        return (test,)
+    if test == 'correlation':
+        return (test, step['method'])
+    if test == 'indep':
+        return (test, tuple(step['groupBy']))
+    if test == 'groupedPaired':
+        return (test, step['sortBy'])
+    if test == 'groupedIndep':
+        return (test, step['sortBy'], tuple(step['groupBy']))
+    return (test, step['name'])
+
+
+def _planJobs(shared, steps):
+    '''Joins the steps that can share their computation in jobs: all the normality measures, paired pairs
+    and Bonferroni measures, the correlation measures of each method and the independent measures of each
+    pair of groups are tested in one batch. Each job is a function without arguments by key.'''
+    byKey = OrderedDict()
+    for step in steps:
+        step['job'] = _planKey(step)
+        byKey.setdefault(step['job'], []).append(step)
+    jobs = OrderedDict()
+    for key, group in byKey.items():
+        if key[0] in ('paired', 'groupedPaired'):
+            pairs = _union([zip(step['measures'][0::2], step['measures'][1::2]) for step in group])
+            jobs[key] = _pairedJob(shared, key, pairs)
+        elif key[0] == 'anova':
+            variables = [m[0] for m in group[0]['measures']]
+            jobs[key] = _anovaJob(shared, variables, [group[0]['conditionName']], [len(variables)])
+        elif key[0] == 'factorialAnova':
+            cells, nLevels = _anovaCells(group[0]['factorNames'], group[0]['measures'])
+            jobs[key] = _anovaJob(shared, cells, group[0]['factorNames'], nLevels)
+        else:
+            jobs[key] = _batchJob(shared, key, _union([step['measures'] for step in group]))
+    return jobs
+
+
+def _pairedJob(shared, key, pairs):
+    left = shared.matrix([pair[0] for pair in pairs])
+    right = shared.matrix([pair[1] for pair in pairs])
+    position = dict((pair, j) for j, pair in enumerate(pairs))
+    if key[0] == 'paired':
+        return lambda: (position, np.array(pairedTtestBatch(left, right)))
+    arrays = {'left': left, 'right': right}
+    return lambda: (position, groupMap(_pairedGroupTask, arrays, shared.indexes[key[1]], len(pairs)))
+
+
+def _batchJob(shared, key, measures):
+    X = shared.matrix(measures)
+    position = dict((name, j) for j, name in enumerate(measures))
+    if key[0] == 'normality':
+        def job():
+            described = _describe(X, ('normaltest',), _sliceKeys(shared.digests(measures)))
+            return position, np.array([described['normalStatistic'], described['normalP']])
+        return job
+    if key[0] == 'bonferroni':
+        return lambda: (position, np.array(pairwiseTtest(X)))
+    if key[0] == 'correlation':
+        return lambda: (position, np.array(correlationMatrix(X, key[1])))
+    groupBy = key[-1]
+    g1 = shared.masks[groupBy[0], groupBy[1]]
+    g2 = shared.masks[groupBy[0], groupBy[2]]
+    if key[0] == 'indep':
+        digests = shared.digests(measures)
+        return lambda: (position, indepTtestBatch(X[g1], X[g2], (_sliceKeys(digests, g1), _sliceKeys(digests, g2))))
+    arrays = {'X': X, 'g1': g1, 'g2': g2, 'digests': shared.digests(measures)}
+    return lambda: (position, groupMap(_indepGroupTask, arrays, shared.indexes[key[1]], len(measures)))
+
+
+def _anovaJob(shared, variables, factorNames, nLevels):
+    Y = shared.matrix(variables)
+    return lambda: (None, anovaWithin(Y[~np.isnan(Y).any(axis=1)], factorNames, nLevels))
+
+
+def _planResult(shared, step, result):
+    '''Result of a step from the result of its job, with only the columns of its own measures.'''
+    position, res = result
+    test = step['test']
+    measures = step['measures']
+    printSig = step['printSig']
+    correction = step['correction']
+    if test in ('anova', 'factorialAnova'):
+        return _anovaResult(res)
+    if test in ('paired', 'groupedPaired'):
+        cols = [position[pair] for pair in zip(measures[0::2], measures[1::2])]
+    else:
+        cols = [position[name] for name in measures]
+    n = shared.X.shape[0]
+    if test == 'normality':
+        return _normalityResult(measures, res[0, cols], res[1, cols], printSig, correction)
+    if test == 'paired':
+        return _pairedResult(measures, res[0, cols], res[1, cols], n, printSig, correction)
+    if test == 'bonferroni':
+        return _bonferroniResult(measures, res[0][np.ix_(cols, cols)], res[1][np.ix_(cols, cols)], n, printSig,
+                                 correction)
+    if test == 'correlation':
+        return _correlResult(_CORREL_TITLES[step['method']], measures, res[0][np.ix_(cols, cols)],
+                             res[1][np.ix_(cols, cols)], res[2][np.ix_(cols, cols)], printSig, correction)
+    if test == 'groupedPaired':
+        return _groupedPairedResult(shared.indexes[step['sortBy']], measures, [r[:, cols] for r in res], printSig,
+                                    correction)
+    variable, label1, label2 = step['groupBy']
+    g1 = shared.masks[variable, label1]
+    g2 = shared.masks[variable, label2]
+    if test == 'indep':
+        return _indepResult(step['groupBy'], measures, res[:, cols], g1.sum(), g2.sum(), printSig, correction)
+    index = shared.indexes[step['sortBy']]
+    return _groupedIndepResult(index, step['groupBy'], measures, [r[:, cols] for r in res], {'g1': g1, 'g2': g2},
+                               printSig, correction)
+
+
+@_profiled
+def runPlan(data, plan, workers=1, quiet=False):
+    '''This function runs all the tests of an analysis plan over data in a single pass. The variables are
+    converted once, the intermediates shared by several steps (column arrays, label masks, group indices and
+    the batches of tests over the same measures) are computed once and the independent jobs run at the same
+    time in workers threads. The tables are printed in the order of the plan.
+    INPUT: data is the dictionary containing the data names and values (dict).  plan is the battery of tests
+           (AnalysisPlan), its dictionary (dict) or the path of a plan file (string) (see AnalysisPlan).
+           workers is the number of jobs computed at the same time (int).  quiet skips printing the tables (bool).
+    OUTPUT: The function prints the table of every step and returns the results by step name (OrderedDict).'''
+    if isinstance(plan, basestring):
+        plan = AnalysisPlan.load(plan)
+    elif isinstance(plan, dict):
+        plan = AnalysisPlan.fromSpec(plan)
+    if not isinstance(data, dict):
+        print ('Error: data must be a dict. Use dataRead function to import your excel data.')
+        return None
+    steps = [dict(step) for step in plan.steps]
+    for step in steps:
+        if 'sortBy' in step and not _checkGrouping(data, step['sortBy']):
+            return None
+        for variable in _planVariables(step):
+            if variable not in data:
+                print('Error: ' + str(variable) + ' is not a variable of data (' + step['name'] + ').')
+                return None
+    with _span('runPlan.prepare'):
+        shared = _PlanData(data, steps)
+        jobs = _planJobs(shared, steps)
+    _count('plan jobs', len(jobs))
+    if workers > 1 and len(jobs) > 1:
+        pool = ThreadPool(min(workers, len(jobs)))
+        try:
+            results = dict(zip(jobs.keys(), pool.map(lambda job: job(), jobs.values())))
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = dict((key, job()) for key, job in jobs.items())
+    tables = OrderedDict()
+    for step in steps:
+        tables[step['name']] = _report(_planResult(shared, step, results[step['job']]), {'quiet': quiet})
+    return tables
+
+
+# -----BATCH PROCESSING-------------------------------------------------------------------------------------------------
+
+
+_WORKBOOKS = ('.xlsx', '.xls')
+
+
+def _batchTask(task):
+    '''Runs a plan over one workbook in a pool process: dataRead, runPlan and exportResults. The messages
+    printed by the functions are captured so the errors come back with the result.'''
+    file, plan, outputDir, fileFormat, cache = task
+    result = {'file': file, 'status': 'error', 'output': None, 'tables': None, 'error': None}
+    start = time.time()
+    log = StringIO()
+    stdout = sys.stdout
+    sys.stdout = log
+    try:
+        tables = runPlan(dataRead(file, cache), plan, quiet=True)
+        if tables is not None:
+            if outputDir is not None:
+                output = os.path.join(outputDir, os.path.splitext(os.path.basename(file))[0] + '.' + fileFormat)
+                exportResults(tables, output, fileFormat)
+                result['output'] = output
+            result['tables'] = tables
+            result['status'] = 'done'
+    except Exception as error:
+        print('Error: ' + type(error).__name__ + ': ' + str(error))
+    finally:
+        sys.stdout = stdout
+    if result['status'] == 'error':
+        result['error'] = ' '.join(line[7:] for line in log.getvalue().splitlines() if line.startswith('Error: '))
+    result['seconds'] = time.time() - start
+    return result
+
+
+class BatchRunner(object):
+    '''Runs an analysis plan over many workbooks at once: each file is read, analyzed and exported in a
+    process of a pool, so reading one file overlaps with the tests of the others. At most concurrency files
+    are in the pool at any time; submit blocks until one finishes, which keeps the memory of a long queue
+    of files bounded. run and watch return a generator of the results in the order they finish, a dict
+    per file with: file, status ('done' or 'error'), output (route of the exported tables), tables (the
+    results of runPlan), error (the error messages) and seconds.
+        with BatchRunner(plan, 'results', workers=4) as runner:
+            for result in runner.watch('incoming', idle=600):
+                print result['file'], result['status']'''
+
+    def __init__(self, plan, outputDir=None, workers=None, concurrency=None, fileFormat='xlsx', cache=None):
+        if isinstance(plan, basestring):
+            plan = AnalysisPlan.load(plan)
+        elif isinstance(plan, dict):
+            plan = AnalysisPlan.fromSpec(plan)
+        if fileFormat not in _EXPORT_FORMATS.values():
+            raise ValueError('fileFormat must be xlsx, csv, npz, parquet or arrow')
+        if outputDir is not None and not os.path.isdir(outputDir):
+            os.makedirs(outputDir)
+        self.plan = plan
+        self.outputDir = outputDir
+        self.fileFormat = fileFormat
+        self.cache = cache
+        self.workers = workers or multiprocessing.cpu_count()
+        self.concurrency = concurrency or 2 * self.workers
+        self.pool = multiprocessing.Pool(self.workers)
+        self.results = Queue.Queue()
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+
+    def submit(self, file):
+        '''Sends file to the pool, waiting while concurrency files are already in it. The result is put in
+        the results queue when it finishes.'''
+        self._slots.acquire()
+        task = (file, self.plan, self.outputDir, self.fileFormat, self.cache)
+        try:
+            pending = self.pool.apply_async(_batchTask, (task,))
+        except Exception:
+            self._slots.release()
+            raise
+        thread = threading.Thread(target=self._finished, args=(file, pending))
+        thread.daemon = True
+        thread.start()
+
+    def _finished(self, file, pending):
+        '''Waits for the result of file and frees its slot. The pool only calls back the tasks that succeed,
+        so the task or its result failing to be sent between the processes (e.g. not picklable) gives an
+        error result here instead of a slot that is never freed.'''
+        result = {'file': file, 'status': 'error', 'output': None, 'tables': None, 'error': None, 'seconds': None}
+        try:
+            result = pending.get()
+        except Exception as error:
+            result['error'] = type(error).__name__ + ': ' + str(error)
+        finally:
+            self._slots.release()
+            self.results.put(result)
+
+    def run(self, files):
+        '''Generator of the results of files (any iterable, e.g. a list or iter(queue.get, None)), which are
+        submitted from a thread while the results are returned.'''
+        submitted = []
+
+        def feed():
+            count = 0
+            try:
+                for file in files:
+                    self.submit(file)
+                    count = count + 1
+            finally:
+                submitted.append(count)
+                self.results.put(None)
+        thread = threading.Thread(target=feed)
+        thread.daemon = True
+        thread.start()
+        received = 0
+        while not submitted or received < submitted[0]:
+            try:
+                result = self.results.get(True, 0.5)
+            except Queue.Empty:
+                continue
+            if result is not None:
+                received = received + 1
+                _count('batch files')
+                yield result
+
+    def watch(self, directory, interval=1.0, idle=None):
+        '''Generator of the results of the workbooks (.xlsx and .xls) found in directory, checked every
+        interval seconds. A file is submitted once its size is the same in two checks, so files still being
+        copied are not read. The files already there are processed first, and the watch stops after idle
+        seconds without new files (never when idle is None).'''
+        return self.run(_watchFiles(directory, interval, idle))
+
+    def close(self):
+        '''Waits for the files in the pool and stops its processes.'''
+        self.pool.close()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        if exception[0] is None:
+            self.close()
+        else:
+            self.pool.terminate()
+            self.pool.join()
+        return False
+
+
+def _watchFiles(directory, interval, idle):
+    seen = set()
+    sizes = {}
+    last = time.time()
+    while True:
+        for name in sorted(os.listdir(directory)):
+            path = os.path.join(directory, name)
+            if path in seen or os.path.splitext(name)[1].lower() not in _WORKBOOKS or name.startswith('~$'):
+                continue
+            size = os.path.getsize(path)
+            if sizes.get(path) == size:
+                seen.add(path)
+                last = time.time()
+                yield path
+            else:
+                sizes[path] = size
+        if idle is not None and time.time() - last > idle:
+            return
+        time.sleep(interval)
+
+
+# -----COMMAND LINE-----------------------------------------------------------------------------------------------------
+
+
+STARTUP_BUDGET = 0.25
+_CLI_OPTIONS = {'groupBy': '--group-by', 'sortBy': '--sort-by', 'method': '--method', 'subID': '--sub-id',
+                'conditionName': '--condition', 'factorNames': '--factors'}
+
+
+def startupTime(runs=5):
+    '''This function measures the start up cost of a batch job: the time of importing this module in a new
+    interpreter, which must stay under STARTUP_BUDGET seconds.
+    INPUT: runs is the number of new interpreters started (int).
+    OUTPUT: Median import time in seconds (float).'''
+    code = 'import time; start = time.time(); import StatisticsFunctions; print(time.time() - start)'
+    directory = os.path.dirname(os.path.abspath(__file__))
+    times = [float(subprocess.check_output([sys.executable, '-c', code], cwd=directory)) for _ in range(runs)]
+    return float(np.median(times))
+
+
+def _cliMeasure(value):
+    '''ANOVA measures are written in the command line as variable:level, e.g. RT_A_0:A:0.'''
+    return tuple(value.split(':')) if ':' in value else value
+
+
+def main(argv=None):
+    '''Command line entry point, runs one test (or a plan file) over the data of a file:
+        python StatisticsFunctions.py paired data.xlsx M1 M2 --sig --export paired.xlsx
+        python StatisticsFunctions.py indep data.xlsx M1 M2 --group-by Group A B
+        python StatisticsFunctions.py anova data.xlsx M1:a M2:b --sub-id Subject --condition cond
+        python StatisticsFunctions.py plan data.xlsx battery.json --workers 4 --profile trace.json
+        python StatisticsFunctions.py batch incoming battery.json --output-dir results --workers 4 --watch
+        python StatisticsFunctions.py --startup
+    OUTPUT: Exit status, 0 when the tables were computed or the start up time is within budget (int).'''
+    import argparse
+    parser = argparse.ArgumentParser(prog='StatisticsFunctions.py', description='Statistics tests over a data file.')
+    parser.add_argument('test', nargs='?', choices=list(_PLAN_TESTS) + ['plan', 'batch'])
+    parser.add_argument('file', nargs='?', help='.xlsx or .xls data file, or the directory of the files for batch')
+    parser.add_argument('measures', nargs='*', help='variables of the test, or the plan file for plan')
+    parser.add_argument('--sig', action='store_true', help='only print the significative results')
+    parser.add_argument('--correction', choices=CORRECTIONS, help='multiple comparison correction of the p-values')
+    parser.add_argument('--group-by', nargs=3, metavar=('VARIABLE', 'GROUP1', 'GROUP2'))
+    parser.add_argument('--sort-by', metavar='VARIABLE')
+    parser.add_argument('--method', default='pearson', choices=sorted(_CORREL_TITLES))
+    parser.add_argument('--sub-id', metavar='VARIABLE')
+    parser.add_argument('--condition', metavar='NAME')
+    parser.add_argument('--factors', nargs='+', metavar='NAME')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--quiet', action='store_true', help='do not print the tables')
+    parser.add_argument('--cache', metavar='DIRECTORY', help='data cache directory (see DataCache)')
+    parser.add_argument('--export', metavar='PATH', help='.xlsx, .csv, .npz, .parquet or .arrow file of the tables')
+    parser.add_argument('--startup', action='store_true', help='measure the import time against the budget')
+    parser.add_argument('--profile', metavar='PATH', help='print the time of each stage and save the JSON trace')
+    parser.add_argument('--output-dir', metavar='DIRECTORY', help='batch: directory of the exported tables')
+    parser.add_argument('--format', default='xlsx', choices=sorted(set(_EXPORT_FORMATS.values())),
+                        help='batch: format of the exported tables')
+    parser.add_argument('--concurrency', type=int, help='batch: maximum number of files in process at once')
+    parser.add_argument('--watch', action='store_true', help='batch: keep checking the directory for new files')
+    parser.add_argument('--interval', type=float, default=1.0, help='batch: seconds between checks of --watch')
+    parser.add_argument('--idle', type=float, help='batch: stop --watch after these seconds without new files')
+    args = parser.parse_args(argv)
+    if args.startup:
+        seconds = startupTime()
+        print('Start up time: %.3f s (budget %.3f s)' % (seconds, STARTUP_BUDGET))
+        return 0 if seconds <= STARTUP_BUDGET else 1
+    if args.test is None or args.file is None:
+        parser.error('test and file are required')
+    if args.test == 'batch':
+        if len(args.measures) != 1:
+            parser.error('batch takes the path of one plan file')
+        return _cliBatch(args)
+    if args.test == 'plan':
+        if len(args.measures) != 1:
+            parser.error('plan takes the path of one plan file')
+        plan = AnalysisPlan.load(args.measures[0])
+    else:
+        options = [_CLI_OPTIONS[name] for name in _PLAN_TESTS[args.test]]
+        arguments = [getattr(args, option[2:].replace('-', '_')) for option in options]
+        if None in arguments:
+            parser.error(args.test + ' needs the options ' + ', '.join(options))
+        measures = [_cliMeasure(measure) for measure in args.measures]
+        try:
+            plan = getattr(AnalysisPlan(args.sig), args.test)(*(arguments + measures), name=args.test,
+                                                              correction=args.correction)
+        except ValueError as error:
+            parser.error(str(error))
+    profiler = Profiler() if args.profile else _NO_SPAN
+    with profiler:
+        tables = runPlan(dataRead(args.file, args.cache), plan, args.workers, args.quiet)
+        if tables is not None and args.export:
+            exportResults(tables, args.export)
+    if args.profile:
+        profiler.show()
+        profiler.saveTrace(args.profile)
+    return 0 if tables is not None else 1
+
+
+def _cliBatch(args):
+    '''Runs the batch command, printing a line for each file as it finishes.'''
+    failed = 0
+    with BatchRunner(args.measures[0], args.output_dir, args.workers, args.concurrency, args.format,
+                     args.cache) as runner:
+        if args.watch:
+            results = runner.watch(args.file, args.interval, args.idle)
+        else:
+            results = runner.run(os.path.join(args.file, name) for name in sorted(os.listdir(args.file))
+                                 if os.path.splitext(name)[1].lower() in _WORKBOOKS)
+        for result in results:
+            if result['status'] == 'done':
+                print('%s: done in %.2f s%s' % (result['file'], result['seconds'],
+                                                ' -> ' + result['output'] if result['output'] else ''))
+            else:
+                failed = failed + 1
+                print('%s: error, %s' % (result['file'], result['error']))
+            sys.stdout.flush()
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,343 @@
+#-*- coding: utf-8 -*-
+'''Benchmarks of StatisticsFunctions over seeded synthetic data.
+
+    python benchmarks.py                          # quick sizes, appended to benchmarks.jsonl
+    python benchmarks.py --size full --label v2   # full sizes, recorded as version v2
+    python benchmarks.py --check --baseline v1    # flags the cases slower than in version v1
+
+Every case runs in a new process so the peak memory of one case does not hide the next one. Each record of
+the history (one JSON object per line) holds the version, the case and its parameters, the best time of the
+repeats, the peak memory increase and the throughput in rows (or tests) per second.'''
+
+from collections import OrderedDict
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import platform
+import Queue
+import resource
+import sys
+import tempfile
+import time
+import traceback
+import numpy as np
+
+import StatisticsFunctions as sf
+
+SIZES = {'quick': {'rows': [2000], 'measures': [20], 'groups': [5], 'design': [(200, 4)], 'resamples': 1000},
+         'full': {'rows': [10000, 100000], 'measures': [20, 200], 'groups': [5, 50],
+                  'design': [(200, 4), (2000, 8)], 'resamples': 10000}}
+
+# -----SYNTHETIC DATA---------------------------------------------------------------------------------------------------
+
+
+def syntheticData(rows, measures, groups, seed=0):
+    '''This function generates a data set as returned by dataRead: a Subject identifier, a Group variable with
+    the values A and B, a Site variable with groups categories and measures normal variables M1, M2... with
+    a common factor, so the correlations and the paired differences are not null.
+    INPUT: rows, measures and groups are the sizes of the data set (int).  seed fixes the values (int).
+    OUTPUT: Data set with rows values in each variable (DataSet).'''
+    random = np.random.RandomState(seed)
+    data = sf.DataSet()
+    data['Subject'] = np.arange(1, rows + 1, dtype=np.float64)
+    data['Group'] = sf.Categorical(random.randint(0, 2, rows).astype(np.int32), ['A', 'B'])
+    data['Site'] = sf.Categorical(random.randint(0, groups, rows).astype(np.int32),
+                                  ['Site' + str(g + 1) for g in range(groups)])
+    common = random.randn(rows)
+    for m in range(measures):
+        data['M' + str(m + 1)] = 0.5 * common + random.randn(rows) + 0.05 * m
+    return data
+
+
+def syntheticDesign(subjects, conditions, seed=0):
+    '''This function generates a repeated measures data set: one row per subject and one variable C1, C2...
+    per condition, with a subject effect and a linear condition effect.
+    INPUT: subjects and conditions are the sizes of the design (int).  seed fixes the values (int).
+    OUTPUT: Data set with the Subject identifier and the conditions (DataSet).'''
+    random = np.random.RandomState(seed)
+    data = sf.DataSet()
+    data['Subject'] = np.arange(1, subjects + 1, dtype=np.float64)
+    subject = random.randn(subjects)
+    for c in range(conditions):
+        data['C' + str(c + 1)] = subject + random.randn(subjects) + 0.1 * c
+    return data
+
+
+def writeFixture(data, path):
+    '''This function writes a data set to an .xlsx, .xls or .csv file that dataRead (or dataStream for csv)
+    reads back. xls files need the xlwt package and are limited to 65535 rows.
+    INPUT: data is the data set (dict).  path is the route of the file (string).
+    OUTPUT: Route of the file written (string).'''
+    names = list(data.keys())
+    columns = [data[name].tolist() for name in names]
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.xlsx':
+        workbook = sf.xls.Workbook(path, {'constant_memory': True})
+        worksheet = workbook.add_worksheet()
+        worksheet.write_row(0, 0, names)
+        for row in range(len(columns[0])):
+            worksheet.write_row(row + 1, 0, [column[row] for column in columns])
+        workbook.close()
+    elif extension == '.xls':
+        import xlwt
+        workbook = xlwt.Workbook()
+        worksheet = workbook.add_sheet('Sheet1')
+        for j in range(len(names)):
+            worksheet.write(0, j, names[j])
+            for row in range(len(columns[j])):
+                worksheet.write(row + 1, j, columns[j][row])
+        workbook.save(path)
+    else:
+        sf.exportResults([[names] + [list(row) for row in zip(*columns)]], path, 'csv')
+    return path
+
+# -----CASES------------------------------------------------------------------------------------------------------------
+
+
+def _cases(size, directory):
+    '''Benchmark cases as (name, parameters, setup, run, items): setup builds the inputs out of the timed
+    region, run(inputs) is timed and items is the number of rows or tests processed by each run.'''
+    sizes = SIZES[size]
+    cases = []
+    for rows in sizes['rows']:
+        for extension in ('.xlsx', '.xls'):
+            if extension == '.xls' and rows > 65535:
+                continue
+            path = os.path.join(directory, 'data_' + str(rows) + extension)
+            cases.append(('dataRead' + extension, {'rows': rows, 'measures': 10},
+                          lambda rows=rows, path=path: writeFixture(syntheticData(rows, 10, 5), path),
+                          lambda path: sf.dataRead(path), rows))
+        for measures in sizes['measures']:
+            names = ['M' + str(m + 1) for m in range(measures)]
+            pairs = measures * (measures - 1) // 2
+            data = lambda rows=rows, measures=measures: syntheticData(rows, measures, 5)
+            parameters = {'rows': rows, 'measures': measures}
+            cases.append(('pairedTtest', parameters, data,
+                          lambda d, names=names: sf.pairedTtest(d, False, *names, quiet=True), measures // 2))
+            cases.append(('indepTtest', parameters, data,
+                          lambda d, names=names: sf.indepTtest(d, False, ['Group', 'A', 'B'], *names, quiet=True),
+                          measures))
+            cases.append(('normalityTest', parameters, data,
+                          lambda d, names=names: sf.normalityTest(d, False, *names, quiet=True), measures))
+            cases.append(('pearsonCorrel', parameters, data,
+                          lambda d, names=names: sf.pearsonCorrel(d, False, *names, quiet=True), pairs))
+            cases.append(('spearmanCorrel', parameters, data,
+                          lambda d, names=names: sf.spearmanCorrel(d, False, *names, quiet=True), pairs))
+            cases.append(('repMeasBonferroniCorrect', parameters, data,
+                          lambda d, names=names: sf.repMeasBonferroniCorrect(d, False, *names, quiet=True), pairs))
+            if rows <= 10000:
+                cases.append(('kendallCorrel', parameters, data,
+                              lambda d, names=names: sf.kendallCorrel(d, False, *names, quiet=True), pairs))
+            plan = sf.AnalysisPlan().normality(*names).paired(*names).indep(['Group', 'A', 'B'], *names)
+            plan.correlation('pearson', *names).groupedIndep('Site', ['Group', 'A', 'B'], *names)
+            cases.append(('runPlan', parameters, data, lambda d, plan=plan: sf.runPlan(d, plan, quiet=True),
+                          len(plan.steps)))
+            tables = lambda rows=rows, measures=measures: [list(row) for row in sf.pearsonCorrel(
+                syntheticData(rows, measures, 5), False, *['M' + str(m + 1) for m in range(measures)],
+                quiet=True).table_matrix]
+            for extension in ('.xlsx', '.csv', '.npz'):
+                path = os.path.join(directory, 'results_' + str(rows) + '_' + str(measures) + extension)
+                cases.append(('exportResults' + extension, parameters, tables,
+                              lambda t, path=path: sf.exportResults([t], path), pairs))
+            path = os.path.join(directory, 'stream_' + str(rows) + '_' + str(measures) + '.csv')
+            cases.append(('streamDescriptives', parameters,
+                          lambda rows=rows, measures=measures, path=path: writeFixture(
+                              syntheticData(rows, measures, 5), path),
+                          lambda path, names=names: sf.streamDescriptives(path, 10000, *names, quiet=True), rows))
+            for groups in sizes['groups']:
+                grouped = dict(parameters, groups=groups)
+                data = lambda rows=rows, measures=measures, groups=groups: syntheticData(rows, measures, groups)
+                cases.append(('analyzeBy', grouped, data, lambda d: sf.analyzeBy(d, 'Site'), rows))
+                cases.append(('groupedPairedTtest', grouped, data,
+                              lambda d, names=names: sf.groupedPairedTtest(d, 'Site', False, *names, quiet=True),
+                              groups * (measures // 2)))
+                cases.append(('groupedIndepTtest', grouped, data,
+                              lambda d, names=names: sf.groupedIndepTtest(d, 'Site', False, ['Group', 'A', 'B'],
+                                                                          *names, quiet=True), groups * measures))
+        resampled = {'rows': rows, 'measures': 2, 'resamples': sizes['resamples']}
+        data = lambda rows=rows: syntheticData(rows, 2, 5)
+        options = {'resamples': sizes['resamples'], 'seed': 1, 'quiet': True}
+        cases.append(('pairedPermutationTest', resampled, data,
+                      lambda d: sf.pairedPermutationTest(d, False, 'M1', 'M2', **options), sizes['resamples']))
+        cases.append(('indepPermutationTest', resampled, data,
+                      lambda d: sf.indepPermutationTest(d, False, ['Group', 'A', 'B'], 'M1', **options),
+                      sizes['resamples']))
+        cases.append(('pearsonPermutationTest', resampled, data,
+                      lambda d: sf.pearsonPermutationTest(d, False, 'M1', 'M2', **options), sizes['resamples']))
+    for subjects, conditions in sizes['design']:
+        parameters = {'subjects': subjects, 'conditions': conditions}
+        data = lambda subjects=subjects, conditions=conditions: syntheticDesign(subjects, conditions)
+        measures = [('C' + str(c + 1), str(c + 1)) for c in range(conditions)]
+        cases.append(('repeatedMeasuresAnova', parameters, data,
+                      lambda d, measures=measures: sf.repeatedMeasuresAnova(d, 'Subject', 'condition', *measures,
+                                                                            quiet=True), subjects))
+        factorial = [('C' + str(c + 1), c // 2, c % 2) for c in range(conditions - conditions % 2)]
+        cases.append(('factorialRepeatedMeasuresAnova', dict(parameters, factors=2), data,
+                      lambda d, factorial=factorial: sf.factorialRepeatedMeasuresAnova(
+                          d, 'Subject', ['A', 'B'], *factorial, quiet=True), subjects))
+    return cases
+
+
+def _loadModules():
+    '''Imports the lazy modules of StatisticsFunctions, so their memory is not counted as the one of a case.'''
+    for module in (sf.stats, sf.xlrd, sf.xls, sf.prettytable):
+        try:
+            getattr(module, '__name__')
+        except ImportError:
+            pass
+
+
+def _measure(setup, run, repeats, queue):
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        inputs = setup()
+        _loadModules()
+        before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        run(inputs)
+        times = []
+        for r in range(repeats):
+            if sf._descriptiveCache is not None:
+                sf._descriptiveCache.clear()
+            start = time.time()
+            run(inputs)
+            times.append(time.time() - start)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before
+    except Exception:
+        queue.put((None, traceback.format_exc()))
+    else:
+        queue.put((min(times), peak / 1024.0))
+
+
+def runCase(setup, run, repeats=3, timeout=None):
+    '''This function times one case in a new process, after an untimed run that warms up the case. The lazy
+    modules are imported and the inputs built before the memory baseline is read, and the descriptives cache
+    is cleared before each run, so the times are those of new data.
+    INPUT: setup builds the inputs of run (function).  run is the timed function (function).  repeats is the
+           number of timed runs (int).  timeout is the limit of the case in seconds, None waits for it (float).
+    OUTPUT: Best time in seconds and peak memory increase in MB of the process during the runs (tuple). A
+            RuntimeError is raised with the traceback of the case when it fails, or when its process ends
+            without a result or runs over the timeout.'''
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_measure, args=(setup, run, repeats, queue))
+    process.start()
+    start = time.time()
+    try:
+        while True:
+            try:
+                seconds, result = queue.get(timeout=1)
+                break
+            except Queue.Empty:
+                if not process.is_alive():
+                    try:
+                        seconds, result = queue.get(timeout=1)
+                        break
+                    except Queue.Empty:
+                        raise RuntimeError('the case ended with exit code %s' % process.exitcode)
+                if timeout is not None and time.time() - start > timeout:
+                    raise RuntimeError('the case ran over %s s' % timeout)
+    finally:
+        if process.is_alive():
+            process.terminate()
+        process.join()
+    if seconds is None:
+        raise RuntimeError(result)
+    return seconds, result
+
+# -----HISTORY----------------------------------------------------------------------------------------------------------
+
+
+def version():
+    '''Version of the benchmarked code: the first 12 hex digits of the sha1 of StatisticsFunctions.py.'''
+    with open(sf.__file__.replace('.pyc', '.py'), 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()[:12]
+
+
+def readHistory(path):
+    '''Records of a history file, one JSON object per line (list).'''
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def runBenchmarks(size='quick', history='benchmarks.jsonl', label=None, repeats=3, names=None, timeout=None):
+    '''This function runs the benchmark cases and appends a record of each one to the history file. The cases
+    that fail are reported and left out of the history.
+    INPUT: size is 'quick' or 'full' (string).  history is the route of the history file (string).  label is
+           the version recorded, by default the hash of the module (string).  repeats is the number of timed
+           runs of each case (int).  names are the cases to run, all by default (list).  timeout is the limit
+           of each case in seconds (float).
+    OUTPUT: The records of the run (list).'''
+    directory = tempfile.mkdtemp(prefix='statistics_benchmarks_')
+    records = []
+    stamp = time.strftime('%Y-%m-%dT%H:%M:%S')
+    for name, parameters, setup, run, items in _cases(size, directory):
+        if names and name not in names:
+            continue
+        try:
+            seconds, peak = runCase(setup, run, repeats, timeout)
+        except RuntimeError as error:
+            print('Error: %s %s failed: %s' % (name, json.dumps(parameters, sort_keys=True), error))
+            continue
+        record = OrderedDict([('version', label or version()), ('date', stamp), ('python', platform.python_version()),
+                              ('case', name), ('parameters', parameters), ('seconds', seconds), ('peakMB', peak),
+                              ('throughput', items / seconds if seconds > 0 else float('inf'))])
+        records.append(record)
+        print('%-32s %-48s %10.4f s %9.1f MB %12.0f /s' % (name, json.dumps(parameters, sort_keys=True), seconds,
+                                                          peak, record['throughput']))
+        with open(history, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+    for file in os.listdir(directory):
+        os.remove(os.path.join(directory, file))
+    os.rmdir(directory)
+    return records
+
+
+def checkRegressions(records, history, baseline=None, tolerance=0.2):
+    '''This function compares the time of each case with the same case and parameters in the history.
+    INPUT: records are the records to check (list).  history are the previous records (list).  baseline is the
+           version to compare with, by default the latest other version of the history (string).  tolerance is
+           the accepted slowdown, 0.2 flags the cases more than 20% slower (float).
+    OUTPUT: List of (case, parameters, baseline seconds, seconds) of the slower cases (list).'''
+    current = set(record['version'] for record in records)
+    previous = [record for record in history if record['version'] not in current]
+    if baseline is None and previous:
+        baseline = previous[-1]['version']
+    reference = {}
+    for record in previous:
+        if record['version'] == baseline:
+            reference[record['case'], json.dumps(record['parameters'], sort_keys=True)] = record['seconds']
+    slower = []
+    for record in records:
+        key = (record['case'], json.dumps(record['parameters'], sort_keys=True))
+        if key in reference and record['seconds'] > reference[key] * (1 + tolerance):
+            slower.append((record['case'], record['parameters'], reference[key], record['seconds']))
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks of StatisticsFunctions.')
+    parser.add_argument('--size', default='quick', choices=sorted(SIZES))
+    parser.add_argument('--history', default='benchmarks.jsonl', help='JSON lines file of the records')
+    parser.add_argument('--label', help='version recorded, by default the hash of StatisticsFunctions.py')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--timeout', type=float, help='limit of each case in seconds')
+    parser.add_argument('--cases', nargs='+', metavar='NAME', help='only run these cases')
+    parser.add_argument('--check', action='store_true', help='exit with 1 when a case is slower than the baseline')
+    parser.add_argument('--baseline', help='version compared by --check, by default the previous one')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args(argv)
+    history = readHistory(args.history)
+    records = runBenchmarks(args.size, args.history, args.label, args.repeats, args.cases, args.timeout)
+    if args.check:
+        slower = checkRegressions(records, history, args.baseline, args.tolerance)
+        for case, parameters, before, after in slower:
+            print('Regression: %s %s %.4f s -> %.4f s' % (case, json.dumps(parameters, sort_keys=True), before, after))
+        return 1 if slower else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,537 @@
+#-*- coding: utf-8 -*-
+'''Tests of StatisticsFunctions.
+
+    python -m unittest test_StatisticsFunctions
+
+The start up test times new interpreters: STATISTICS_STARTUP_BUDGET overrides the budget in seconds and
+STATISTICS_SKIP_TIMING=1 skips it on loaded machines.'''
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from StringIO import StringIO
+import numpy as np
+from scipy import stats
+
+import StatisticsFunctions as sf
+from benchmarks import syntheticData, writeFixture
+
+try:
+    import xlwt
+except ImportError:
+    xlwt = None
+
+
+def _quiet(function, *args, **options):
+    '''Calls function with stdout captured, the tests print the error messages of the module.'''
+    stdout = sys.stdout
+    sys.stdout = StringIO()
+    try:
+        return function(*args, **options)
+    finally:
+        sys.stdout = stdout
+
+
+class StartupTest(unittest.TestCase):
+
+    @unittest.skipIf(os.environ.get('STATISTICS_SKIP_TIMING'), 'timing tests disabled')
+    def test_startupBudget(self):
+        budget = float(os.environ.get('STATISTICS_STARTUP_BUDGET', sf.STARTUP_BUDGET))
+        self.assertLessEqual(sf.startupTime(3), budget)
+
+
+class NumericTextTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.data = sf.DataSet()
+        self.data['Code'] = sf.Categorical.fromValues(['%03d' % (i + 1) for i in range(12)])
+        self.data['Arm'] = sf.Categorical.fromValues(['1', '2'] * 6)
+        self.data['M'] = np.arange(12.) ** 1.5
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def check(self, extension):
+        path = writeFixture(self.data, os.path.join(self.directory, 'data' + extension))
+        data = _quiet(sf.dataRead, path)
+        self.assertIsInstance(data['Code'], sf.Categorical)
+        self.assertEqual(data['Code'].tolist()[:2], ['001', '002'])
+        self.assertIsInstance(data['Arm'], sf.Categorical)
+        result = sf.indepTtest(data, False, ['Arm', '1', '2'], 'M', quiet=True)
+        statistic, p = stats.ttest_ind(self.data['M'][0::2], self.data['M'][1::2])
+        self.assertAlmostEqual(result.pValue[0], p)
+
+    def test_xlsx(self):
+        self.check('.xlsx')
+
+    @unittest.skipIf(xlwt is None, 'needs xlwt')
+    def test_xls(self):
+        self.check('.xls')
+
+
+class DataCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_cachedDataWritable(self):
+        path = writeFixture(sf.DataSet([('M', np.arange(5.))]), os.path.join(self.directory, 'data.xlsx'))
+        cache = sf.DataCache(os.path.join(self.directory, 'cache'))
+        _quiet(sf.dataRead, path, cache)
+        data = _quiet(sf.dataRead, path, cache)
+        data['M'][0] = 10.
+        self.assertEqual(_quiet(sf.dataRead, path, cache)['M'][0], 0.)
+
+
+class GroupedIndepTtestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.data = sf.DataSet()
+        self.data['Site'] = sf.Categorical.fromValues(['N'] * 6 + ['S'] * 4)
+        self.data['Arm'] = sf.Categorical.fromValues(['A', 'B'] * 3 + ['A'] * 4)
+        self.data['M'] = np.arange(10.) ** 1.5
+
+    def test_emptyStratum(self):
+        for workers in (1, 2):
+            result = sf.groupedIndepTtest(self.data, 'Site', False, ['Arm', 'A', 'B'], 'M', quiet=True,
+                                          workers=workers, correction='holm')
+            self.assertEqual([row[0] for row in result.table_matrix[1:]], ['N'])
+            statistic, p = stats.ttest_ind(self.data['M'][0:6:2], self.data['M'][1:6:2])
+            self.assertAlmostEqual(result.pValue[0], p)
+            self.assertTrue(np.isnan(result.pValue[1]))
+
+    def test_emptyGroup(self):
+        t, p = sf.indepTtestBatch(np.empty((0, 1)), np.ones((3, 1)))[2:4]
+        self.assertTrue(np.isnan(t[0]) and np.isnan(p[0]))
+
+
+class ExportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_unknownExtension(self):
+        for name in ('results', 'out.xls'):
+            path = os.path.join(self.directory, name)
+            _quiet(sf.exportResult, [['a', 'b'], ['x', 1.5]], path)
+            self.assertEqual(sf.xlrd.open_workbook(path).sheet_by_index(0).row_values(1), [u'x', 1.5])
+
+
+class DescriptiveCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        sf.setDescriptiveCache()
+
+    def test_inPlaceEdit(self):
+        data = sf.DataSet()
+        data['M'] = np.random.RandomState(0).randn(50)
+        sf.normalityTest(data, False, 'M', quiet=True)
+        data['M'][:25] **= 3
+        result = sf.normalityTest(data, False, 'M', quiet=True)
+        statistic, p = stats.normaltest(data['M'])
+        self.assertAlmostEqual(result.table_matrix[1][1], statistic)
+        self.assertAlmostEqual(result.table_matrix[1][2], p)
+
+    def test_copyIsHit(self):
+        data = sf.DataSet()
+        data['M'] = np.random.RandomState(0).randn(50)
+        sf.normalityTest(data, False, 'M', quiet=True)
+        hits = sf._descriptiveCache.hits
+        copy = sf.DataSet()
+        copy['M'] = data['M'].copy()
+        sf.normalityTest(copy, False, 'M', quiet=True)
+        self.assertGreater(sf._descriptiveCache.hits, hits)
+
+
+class DataStreamTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'data.csv')
+        with open(self.path, 'w') as f:
+            f.write('Code,Site,M\n')
+            for i in range(10):
+                f.write('%s,%s,%d\n' % ('NA' if i == 7 else i, 'S1' if i < 5 else 2, i * i))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_typesOfFirstChunk(self):
+        chunks = list(sf.dataStream(self.path, 5))
+        code = np.concatenate([chunk['Code'] for chunk in chunks])
+        self.assertTrue(np.isnan(code[7]))
+        self.assertEqual(np.nansum(code), 45 - 7)
+        self.assertIsInstance(chunks[1]['Site'], sf.Categorical)
+        result = sf.streamDescriptives(self.path, 5, 'Code', 'M', quiet=True)
+        self.assertEqual(result.table_matrix[1][1:3], [9, 38 / 9.])
+
+    def test_columnStore(self):
+        store = sf.ColumnStore.create(os.path.join(self.directory, 'store'), sf.dataStream(self.path, 5))
+        self.assertEqual(store.numeric(), ['Code', 'M'])
+        self.assertEqual(store.column('Site').tolist(), ['S1'] * 5 + ['2'] * 5)
+
+
+class PairwiseTtestTest(unittest.TestCase):
+
+    def test_chunks(self):
+        X = np.random.RandomState(0).randn(30, 6)
+        t, p = sf.pairwiseTtest(X, maxBytes=32 * 30 * 2)
+        for i in range(6):
+            for j in range(i + 1, 6):
+                statistic, pValue = stats.ttest_rel(X[:, i], X[:, j])
+                self.assertAlmostEqual(t[i, j], statistic)
+                self.assertAlmostEqual(t[j, i], -statistic)
+                self.assertAlmostEqual(p[j, i], pValue)
+
+
+class GroupIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.data = sf.DataSet()
+        self.data['Site'] = np.array([1, 1, 2, np.nan, 2, np.nan, 1, 2, np.nan, np.nan])
+        self.data['M1'] = np.arange(10.) ** 1.5
+        self.data['M2'] = np.arange(10.)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_missingGroup(self):
+        index = sf.GroupIndex(self.data['Site'])
+        self.assertEqual(index.categories, [1.0, 2.0, ''])
+        self.assertEqual(index.rows(2).tolist(), [3, 5, 8, 9])
+
+    def test_blankCells(self):
+        path = os.path.join(self.directory, 'data.xlsx')
+        workbook = sf.xls.Workbook(path)
+        worksheet = workbook.add_worksheet()
+        worksheet.write_row(0, 0, ['Site', 'M1', 'M2'])
+        for row in range(10):
+            site = self.data['Site'][row]
+            worksheet.write_row(row + 1, 0, ['' if np.isnan(site) else site, self.data['M1'][row], row])
+        workbook.close()
+        data = _quiet(sf.dataRead, path)
+        self.assertEqual(list(sf.analyzeBy(data, 'Site').keys()), [1.0, 2.0, ''])
+        result = sf.groupedPairedTtest(data, 'Site', False, 'M1', 'M2', quiet=True)
+        self.assertEqual([row[0] for row in result.table_matrix[1:]], [1.0, 2.0, ''])
+        moments = sf.GroupMoments().update(data['Site'], data['M1'])
+        self.assertEqual(list(moments.groups.keys()), [1.0, 2.0, ''])
+        self.assertEqual(moments.groups[''].n, 4)
+
+
+def _epsilon(T, df):
+    '''Greenhouse-Geisser epsilon from the covariance T of the scores of an effect centered within subjects
+    (the double centered covariance matrix), whose nonzero eigenvalues are those of the contrasts.'''
+    return np.trace(T) ** 2 / (df * (T ** 2).sum())
+
+
+def _centered(Y, *axes):
+    '''Y with the mean over each of axes removed (axis 0 are the subjects).'''
+    for axis in axes:
+        Y = Y - Y.mean(axis=axis, keepdims=True)
+    return Y
+
+
+class AnovaTest(unittest.TestCase):
+
+    def setUp(self):
+        random = np.random.RandomState(3)
+        self.n = 12
+        self.Y = (random.randn(self.n, 1) + random.randn(self.n, 6) * np.array([0.5, 1, 2, 0.7, 1.5, 3]) +
+                  np.array([0, 0.3, 0.5, 0.2, 0.9, 1.4]))
+
+    def check(self, r, ss, sse, df, dfe, eps):
+        self.assertAlmostEqual(r['ss'], ss)
+        self.assertAlmostEqual(r['sse'], sse)
+        self.assertEqual((r['df'], r['dfe']), (df, dfe))
+        F = (ss / df) / (sse / dfe)
+        self.assertAlmostEqual(r['F'], F)
+        self.assertAlmostEqual(r['p'], stats.f.sf(F, df, dfe))
+        hf = min(1.0, (self.n * df * eps - 2) / (df * (self.n - 1 - df * eps))) if df > 1 else 1.0
+        for x, e in (('_gg', eps), ('_hf', hf), ('_lb', 1.0 / df)):
+            self.assertAlmostEqual(r['df' + x], df * e)
+            self.assertAlmostEqual(r['dfe' + x], dfe * e)
+            self.assertAlmostEqual(r['p' + x], stats.f.sf(F, df * e, dfe * e))
+
+    def test_oneWay(self):
+        Y = self.Y[:, :4]
+        n, k = Y.shape
+        grand = Y.mean()
+        ss = n * ((Y.mean(axis=0) - grand) ** 2).sum()
+        sse = ((Y - grand) ** 2).sum() - ss - k * ((Y.mean(axis=1) - grand) ** 2).sum()
+        eps = _epsilon(np.cov(_centered(Y, 1).T), k - 1)
+        aov = sf.anovaWithin(Y, ['condition'], [k])
+        self.check(aov['condition', ], ss, sse, k - 1.0, (k - 1.0) * (n - 1), eps)
+        self.assertAlmostEqual(aov['condition', ]['df_gg'], 1.7732, 4)
+        data = sf.DataSet([('Subject', np.arange(n, dtype=np.float64))] +
+                          [('C' + str(c), Y[:, c]) for c in range(k)])
+        result = sf.repeatedMeasuresAnova(data, 'Subject', 'condition', *[('C' + str(c), c) for c in range(k)],
+                                          quiet=True)
+        self.assertAlmostEqual(result.statistic[0], aov['condition', ]['F'])
+        self.assertAlmostEqual(result.table_matrix[2][3], aov['condition', ]['df_gg'])
+
+    def test_twoFactors(self):
+        n = self.n
+        Y = self.Y.reshape(n, 2, 3)
+        A = Y.mean(axis=2)
+        B = Y.mean(axis=1)
+        AB = _centered(Y, 1, 2)
+        aov = sf.anovaWithin(self.Y, ['A', 'B'], [2, 3])
+        self.check(aov['A', ], 3 * n * (_centered(A, 1).mean(axis=0) ** 2).sum(),
+                   3 * (_centered(A, 0, 1) ** 2).sum(), 1.0, n - 1.0, 1.0)
+        self.check(aov['B', ], 2 * n * (_centered(B, 1).mean(axis=0) ** 2).sum(),
+                   2 * (_centered(B, 0, 1) ** 2).sum(), 2.0, 2.0 * (n - 1), _epsilon(np.cov(_centered(B, 1).T), 2))
+        self.check(aov['A', 'B'], n * (AB.mean(axis=0) ** 2).sum(), (_centered(AB, 0) ** 2).sum(), 2.0,
+                   2.0 * (n - 1), _epsilon(np.cov(AB.reshape(n, 6).T), 2))
+        data = sf.DataSet([('Subject', np.arange(n, dtype=np.float64))] +
+                          [('C' + str(c), self.Y[:, c]) for c in range(6)])
+        result = sf.factorialRepeatedMeasuresAnova(data, 'Subject', ['A', 'B'],
+                                                   *[('C' + str(c), c // 3, c % 3) for c in range(6)], quiet=True)
+        self.assertEqual(result.labels, ['A', 'B', 'A * B'])
+        for effect, F in zip(aov.values(), result.statistic):
+            self.assertAlmostEqual(F, effect['F'])
+
+
+class PermutationTest(unittest.TestCase):
+
+    def test_workers(self):
+        data = sf.DataSet()
+        random = np.random.RandomState(0)
+        for m in range(4):
+            data['M' + str(m + 1)] = random.randn(40) + 0.2 * m
+        measures = ['M1', 'M2', 'M3', 'M4']
+        serial = sf.pairedPermutationTest(data, False, *measures, resamples=2000, seed=5, quiet=True)
+        parallel = sf.pairedPermutationTest(data, False, *measures, resamples=2000, seed=5, workers=2, quiet=True)
+        self.assertEqual(serial.table_matrix, parallel.table_matrix)
+        single = sf.pairedPermutationTest(data, False, 'M3', 'M4', resamples=2000, seed=5, quiet=True)
+        self.assertEqual(sf.pairedPermutationTest(data, False, 'M3', 'M4', resamples=2000, seed=5, quiet=True,
+                                                  workers=2).table_matrix, single.table_matrix)
+
+
+class AccumulatorTest(unittest.TestCase):
+
+    def setUp(self):
+        random = np.random.RandomState(2)
+        self.X = random.randn(60, 3) + np.array([0, 0.5, 1])
+        self.X[[4, 17], [0, 2]] = np.nan
+        self.labels = np.array(['A', 'B', 'C'])[random.randint(0, 3, 60)]
+
+    def test_pairedMoments(self):
+        single = sf.PairedMoments().update(self.X[:, 0], self.X[:, 1])
+        merged = sf.PairedMoments().update(self.X[:25, 0], self.X[:25, 1])
+        merged.merge(sf.PairedMoments().update(self.X[25:, 0], self.X[25:, 1]))
+        self.assertEqual(merged.n, single.n)
+        self.assertAlmostEqual(merged.mean, single.mean)
+        self.assertAlmostEqual(merged.variance(), single.variance())
+        np.testing.assert_allclose(merged.ttest(), single.ttest())
+        x, y = self.X[:, 0], self.X[:, 1]
+        keep = ~np.isnan(x - y)
+        np.testing.assert_allclose(single.ttest(), stats.ttest_rel(x[keep], y[keep]))
+
+    def test_coMoments(self):
+        single = sf.CoMoments(3).update(self.X)
+        merged = sf.CoMoments(3)
+        for rows in (slice(0, 10), slice(10, 11), slice(11, 60)):
+            merged.merge(sf.CoMoments(3).update(self.X[rows]))
+        self.assertEqual(merged.n, single.n)
+        np.testing.assert_allclose(merged.mean, single.mean)
+        np.testing.assert_allclose(merged.C, single.C)
+        complete = self.X[~np.isnan(self.X).any(axis=1)]
+        np.testing.assert_allclose(merged.covariance(), np.cov(complete.T))
+        r, p = merged.correlation()
+        np.testing.assert_allclose(r[0, 2], stats.pearsonr(complete[:, 0], complete[:, 2])[0])
+
+    def test_groupMoments(self):
+        values = self.X[:, 1]
+        single = sf.GroupMoments().update(self.labels, values)
+        merged = sf.GroupMoments().update(self.labels[:30], values[:30])
+        merged.merge(sf.GroupMoments().update(self.labels[30:], values[30:]))
+        for label in single.groups:
+            self.assertEqual(merged.groups[label].n, single.groups[label].n)
+            self.assertAlmostEqual(merged.groups[label].mean, single.groups[label].mean)
+            self.assertAlmostEqual(merged.groups[label].m2, single.groups[label].m2)
+        groups = [values[self.labels == label] for label in single.groups]
+        np.testing.assert_allclose(merged.anova(), stats.f_oneway(*groups))
+        np.testing.assert_allclose(merged.bartlett(), stats.bartlett(*groups))
+        a, b = values[self.labels == 'A'], values[self.labels == 'B']
+        np.testing.assert_allclose(merged.ttest('A', 'B'), stats.ttest_ind(a, b, equal_var=False))
+        np.testing.assert_allclose(merged.ttest('A', 'B', True), stats.ttest_ind(a, b))
+
+
+class ResultTableTest(unittest.TestCase):
+
+    def test_comparisons(self):
+        data = sf.DataSet([('M1', np.arange(6.)), ('M2', np.arange(6.) ** 2)])
+        result = sf.pairedTtest(data, False, 'M1', 'M2', quiet=True)
+        self.assertTrue(result == result.table_matrix)
+        self.assertTrue(result == sf.pairedTtest(data, False, 'M1', 'M2', quiet=True))
+        self.assertFalse(result != list(result))
+        for other in (None, 3, 'table', tuple(result)):
+            self.assertFalse(result == other)
+            self.assertTrue(result != other)
+        self.assertNotEqual(result, None)
+        self.assertIn(result, [None, result.table_matrix])
+
+
+def _referenceCorrection(p, method):
+    '''Adjusted p-values from the definitions, one p-value at a time.'''
+    m = len(p)
+    order = sorted(range(m), key=lambda i: p[i])
+    ranked = [p[i] for i in order]
+    c = sum(1.0 / k for k in range(1, m + 1)) if method == 'fdr_by' else 1.0
+    adjusted = [0.0] * m
+    for r in range(m):
+        if method == 'bonferroni':
+            value = m * ranked[r]
+        elif method == 'holm':
+            value = max((m - k) * ranked[k] for k in range(r + 1))
+        elif method == 'hochberg':
+            value = min((m - k) * ranked[k] for k in range(r, m))
+        else:
+            value = min(m * c / (k + 1) * ranked[k] for k in range(r, m))
+        adjusted[order[r]] = min(value, 1.0)
+    return adjusted
+
+
+class CorrectionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.p = np.array([0.01, 0.04, 0.03, 0.2, 0.005, 0.6, 0.045, 0.0001])
+
+    def test_reference(self):
+        for method in sf.CORRECTIONS:
+            np.testing.assert_allclose(sf.correctPValues(self.p, method), _referenceCorrection(list(self.p), method))
+
+    def test_nan(self):
+        p = np.insert(self.p, [0, 3], np.nan).reshape(2, 5)
+        for method in sf.CORRECTIONS:
+            adjusted = sf.correctPValues(p, method)
+            self.assertEqual(adjusted.shape, (2, 5))
+            self.assertTrue(np.isnan(adjusted.ravel()[[0, 4]]).all())
+            np.testing.assert_allclose(adjusted.ravel()[~np.isnan(p.ravel())], sf.correctPValues(self.p, method))
+        self.assertRaises(ValueError, sf.correctPValues, self.p, 'sidak')
+
+    def test_tests(self):
+        data = sf.DataSet()
+        random = np.random.RandomState(1)
+        for m in range(4):
+            data['M' + str(m + 1)] = random.randn(20) + 0.3 * m
+        measures = ['M1', 'M2', 'M3', 'M4']
+        result = sf.pairedTtest(data, False, *measures, quiet=True, correction='holm')
+        np.testing.assert_allclose(result.pAdjusted, sf.correctPValues(result.pValue, 'holm'))
+        self.assertEqual(result.table_matrix[0][-1], 'Adj. p-Value')
+        result = sf.repMeasBonferroniCorrect(data, False, *measures, quiet=True, correction='bonferroni')
+        self.assertEqual(len(result.labels), 12)
+        pairs = dict(zip(result.labels, zip(result.pValue, result.pAdjusted)))
+        for a in range(4):
+            for b in range(a + 1, 4):
+                p, adjusted = pairs[measures[a] + '/' + measures[b]]
+                self.assertEqual(pairs[measures[b] + '/' + measures[a]][1], adjusted)
+                self.assertAlmostEqual(adjusted, min(1.0, 6 * p))
+
+
+class ColumnStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        random = np.random.RandomState(4)
+        self.data = sf.DataSet()
+        self.data['Group'] = sf.Categorical.fromValues(list('ABBABAABBA' * 3))
+        common = random.randn(30)
+        for m in range(5):
+            self.data['M' + str(m + 1)] = common + random.randn(30) + 0.2 * m
+        self.data['M2'][[3, 11]] = np.nan
+        self.measures = ['M1', 'M2', 'M3', 'M4', 'M5']
+        chunks = [sf.DataSet((name, column[rows]) for name, column in self.data.items())
+                  for rows in (slice(0, 12), slice(12, 30))]
+        self.store = sf.ColumnStore.create(os.path.join(self.directory, 'store'), chunks)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def assertSameTests(self, result, reference):
+        self.assertEqual(sorted(result.labels), sorted(reference.labels))
+        tests = dict(zip(reference.labels, zip(reference.statistic, reference.pValue)))
+        np.testing.assert_allclose(np.column_stack((result.statistic, result.pValue)),
+                                   [tests[label] for label in result.labels])
+
+    def test_correlation(self):
+        result = sf.storeCorrelation(self.store, False, quiet=True, tileSize=2)
+        self.assertSameTests(result, sf.pearsonCorrel(self.data, False, *self.measures, quiet=True))
+
+    def test_pairedTtest(self):
+        pairs = ['M1', 'M3', 'M4', 'M5', 'M3', 'M1']
+        result = sf.storePairedTtest(self.store, False, *pairs, quiet=True, tileSize=2)
+        self.assertSameTests(result, sf.pairedTtest(self.data, False, *pairs, quiet=True))
+
+    def test_indepTtest(self):
+        result = sf.storeIndepTtest(self.store, False, ['Group', 'A', 'B'], quiet=True, tileSize=2)
+        self.assertSameTests(result, sf.indepTtest(self.data, False, ['Group', 'A', 'B'], *self.measures,
+                                                   quiet=True))
+
+    def test_notAStore(self):
+        self.assertIsNone(_quiet(sf.storeIndepTtest, self.data, False, ['Group', 'A', 'B']))
+        self.assertIsNone(_quiet(sf.storeCorrelation, self.data, False))
+
+
+class BatchRunnerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.inputs = os.path.join(self.directory, 'inputs')
+        os.makedirs(self.inputs)
+        self.plan = sf.AnalysisPlan().normality('M1', 'M2').indep(['Group', 'A', 'B'], 'M1', 'M2')
+        writeFixture(syntheticData(40, 2, 2), os.path.join(self.inputs, 'good.xlsx'))
+        missing = syntheticData(40, 2, 2)
+        del missing['M2']
+        writeFixture(missing, os.path.join(self.inputs, 'missing.xlsx'))
+        with open(os.path.join(self.inputs, 'corrupt.xlsx'), 'wb') as f:
+            f.write('not a workbook')
+        with open(os.path.join(self.inputs, 'notes.txt'), 'w') as f:
+            f.write('skipped')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_run(self):
+        output = os.path.join(self.directory, 'results')
+        files = [os.path.join(self.inputs, name) for name in ('good.xlsx', 'missing.xlsx', 'corrupt.xlsx')]
+        with sf.BatchRunner(self.plan, output, workers=2, concurrency=1) as runner:
+            results = dict((os.path.basename(result['file']), result) for result in runner.run(files))
+        self.assertEqual(results['good.xlsx']['status'], 'done')
+        self.assertTrue(os.path.exists(results['good.xlsx']['output']))
+        data = sf.dataRead(files[0])
+        reference = sf.indepTtest(data, False, ['Group', 'A', 'B'], 'M1', 'M2', quiet=True)
+        indep = [table for table in results['good.xlsx']['tables'].values() if table[0][0] == reference[0][0]]
+        self.assertEqual(indep, [reference.table_matrix])
+        for name in ('missing.xlsx', 'corrupt.xlsx'):
+            self.assertEqual(results[name]['status'], 'error')
+            self.assertTrue(results[name]['error'])
+            self.assertIsNone(results[name]['output'])
+        self.assertIn('M2', results['missing.xlsx']['error'])
+
+    def test_taskNotSent(self):
+        with sf.BatchRunner(self.plan, workers=1, concurrency=1, cache=lambda: None) as runner:
+            results = list(runner.run([os.path.join(self.inputs, 'good.xlsx')] * 2))
+        self.assertEqual([result['status'] for result in results], ['error', 'error'])
+
+    def test_watch(self):
+        open(os.path.join(self.inputs, '~$good.xlsx'), 'w').close()
+        files = list(sf._watchFiles(self.inputs, 0.05, 0.2))
+        self.assertEqual([os.path.basename(file) for file in files], ['corrupt.xlsx', 'good.xlsx', 'missing.xlsx'])
+        with sf.BatchRunner(self.plan, workers=1) as runner:
+            statuses = sorted(result['status'] for result in runner.watch(self.inputs, 0.05, 0.2))
+        self.assertEqual(statuses, ['done', 'error', 'error'])
+
+
+if __name__ == '__main__':
+    unittest.main()